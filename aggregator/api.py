@@ -1,155 +1,813 @@
-from fastapi import FastAPI, HTTPException
-from requests import get
+from fastapi import BackgroundTasks, FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+import time
+import asyncio
+import contextvars
+import functools
+import hmac
+import json
 import os
-import httpx
-from datetime import datetime, timedelta
-from scrapers.LetterBoxd.scrape_functions import scrape_film
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from aggregator import upstream
+from aggregator.breaker import CircuitBreaker
+from aggregator.cache import ScoreCache, SQLiteBackend, body_etag, normalize_title
+from aggregator.governor import SQLiteCooldowns
+from aggregator.health import DependencyProber
+from aggregator import profiling
+from aggregator import serialization
+from aggregator.metrics import registry
+from aggregator import timing
+from aggregator.singleflight import SingleFlight
+from aggregator.warmer import CacheWarmer
+from scrapers.LetterBoxd.scrape_functions import scrape_film, scrape_list_titles
 from scrapers.RottenTomato.movie import Movie
+from scrapers.RottenTomato import standalone
 from scrapers.RottenTomato.exceptions import LookupError
+from scrapers.RottenTomato.utils import REQUEST_HEADERS
 
 from fastapi import FastAPI
-import sentry_sdk
 import logging
 
-sentry_sdk.init(
-    dsn="https://802878ce0920728bc6636a4b77a0e9c7@o4508185427443712.ingest.us.sentry.io/4508185429540864",
-    # Set traces_sample_rate to 1.0 to capture 100%
-    # of transactions for tracing.
-    traces_sample_rate=1.0,
-    _experiments={
-        # Set continuous_profiling_auto_start to True
-        # to automatically start the profiler on when
-        # possible.
-        "continuous_profiling_auto_start": True,
-    },
-)
+# Sentry is only set up when a DSN is configured. Tracing and profiling are
+# sampled per transaction; a rate of 0 leaves them switched off entirely.
+SENTRY_DSN = os.getenv("SENTRY_DSN")
+SENTRY_TRACES_SAMPLE_RATE = float(os.getenv("SENTRY_TRACES_SAMPLE_RATE", 0))
+SENTRY_PROFILES_SAMPLE_RATE = float(os.getenv("SENTRY_PROFILES_SAMPLE_RATE", 0))
+
+def init_sentry():
+    if not SENTRY_DSN:
+        return
+    import sentry_sdk
+
+    sentry_sdk.init(
+        dsn=SENTRY_DSN,
+        environment=os.getenv("SENTRY_ENVIRONMENT"),
+        # None rather than 0, so the tracing machinery is not installed at all
+        traces_sample_rate=SENTRY_TRACES_SAMPLE_RATE or None,
+        # Profiles are only taken for transactions that are traced
+        profiles_sample_rate=SENTRY_PROFILES_SAMPLE_RATE or None,
+    )
+
+init_sentry()
 
-app = FastAPI()
-# Simple in-memory cache
-cache = {}
+# Token required by the /admin endpoints. They are disabled when it is unset.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", 60))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled session serves every upstream call for the life of the process
+    upstream.open_session()
+    prober.start()
+    if warmer is not None:
+        warmer.start()
+    app.state.started = True
+    yield
+    app.state.started = False
+    if warmer is not None:
+        await warmer.stop()
+    await prober.stop()
+    upstream.close_session()
+
+app = FastAPI(lifespan=lifespan)
+# Bounded in-memory cache: entries go stale after CACHE_DURATION and the least
+# recently used ones are evicted once either size limit is reached. Stale
+# entries are still served for CACHE_STALE_GRACE while they are refreshed.
 CACHE_DURATION = timedelta(hours=24)
+CACHE_STALE_GRACE = timedelta(seconds=int(os.getenv("CACHE_STALE_GRACE_SECONDS", 6 * 60 * 60)))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 2048))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", 32 * 1024 * 1024))
+# "sqlite" shares one on-disk cache between every worker on the host and keeps
+# it across restarts, "memory" keeps the cache private to this process.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite")
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", os.path.join(tempfile.gettempdir(), "movie-aggregator-cache.sqlite3"))
+CACHE_L1 = os.getenv("CACHE_L1", "1") != "0"
+cache = ScoreCache(ttl=CACHE_DURATION, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES,
+                   stale_grace=CACHE_STALE_GRACE,
+                   backend=SQLiteBackend(CACHE_DB_PATH) if CACHE_BACKEND == "sqlite" else None,
+                   use_l1=CACHE_L1)
+if CACHE_BACKEND == "sqlite":
+    # Workers sharing the cache database also share upstream cooldowns, so a
+    # 429 seen by one of them pauses that host for all of them
+    upstream.governor.shared = SQLiteCooldowns(CACHE_DB_PATH)
+# Lookups currently in flight, keyed by normalized title
+inflight = SingleFlight()
+
+# POST /movies accepts at most BATCH_MAX_TITLES titles and looks up at most
+# BATCH_CONCURRENCY uncached titles at a time
+BATCH_MAX_TITLES = int(os.getenv("BATCH_MAX_TITLES", 100))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 8))
+
+# Upper bound on how long a lookup waits for its sources. Each source gets its
+# own deadline within that budget, and a source that misses it is left out of
+# the aggregate and reported under "timed_out".
+REQUEST_BUDGET = float(os.getenv("REQUEST_BUDGET_SECONDS", 8))
+SOURCE_DEADLINES = {
+    "letterboxd": min(float(os.getenv("LETTERBOXD_DEADLINE_SECONDS", REQUEST_BUDGET)), REQUEST_BUDGET),
+    "rotten_tomatoes": min(float(os.getenv("ROTTEN_TOMATOES_DEADLINE_SECONDS", REQUEST_BUDGET)), REQUEST_BUDGET),
+    "imdb": min(float(os.getenv("IMDB_DEADLINE_SECONDS", 3)), REQUEST_BUDGET),
+}
+# Blocking source lookups run on their own pool, so they never wait behind
+# health probes or cache reads on the default executor. Each lookup holds a
+# thread until its source answers or its deadline passes.
+LOOKUP_THREADS = int(os.getenv("LOOKUP_THREADS", 32))
+lookup_executor = ThreadPoolExecutor(max_workers=LOOKUP_THREADS, thread_name_prefix="lookup")
+# Each source sits behind a circuit breaker. It opens once BREAKER_FAILURE_RATE
+# of the last BREAKER_WINDOW calls failed or took longer than
+# BREAKER_SLOW_CALL_SECONDS, skips the source while open and lets one probe
+# through after BREAKER_RESET_SECONDS. Skipped sources are reported under "circuit_open".
+breakers = {
+    source: CircuitBreaker(
+        source,
+        window=int(os.getenv("BREAKER_WINDOW", 20)),
+        min_calls=int(os.getenv("BREAKER_MIN_CALLS", 5)),
+        failure_rate=float(os.getenv("BREAKER_FAILURE_RATE", 0.5)),
+        slow_call_seconds=float(os.getenv("BREAKER_SLOW_CALL_SECONDS", 5)),
+        reset_timeout=float(os.getenv("BREAKER_RESET_SECONDS", 30)),
+    )
+    for source in SOURCE_DEADLINES
+}
+# What each source contributes to the aggregate when it was skipped
+SKIPPED_RESULTS = {
+    "letterboxd": {"letterboxd_score": 0},
+    "rotten_tomatoes": {"critic_score": 0, "audience_score": 0, "aggregate_score": 0},
+    "imdb": {"title": None, "imdb_score": 0, "year": None, "poster": None},
+}
 
 logger = logging.getLogger(__name__)
 
+REQUESTS_IN_FLIGHT = registry.gauge("aggregator_requests_in_flight", "HTTP requests currently being handled.")
+HTTP_REQUESTS = registry.counter(
+    "aggregator_http_requests_total", "HTTP requests handled, by route and status.", ("method", "route", "status")
+)
+SOURCE_SECONDS = registry.histogram(
+    "aggregator_source_seconds", "End-to-end latency of each source lookup, by outcome.", ("source", "outcome")
+)
+registry.callback("aggregator_cache_entries", "Entries held in the in-memory cache.", "gauge", lambda: len(cache))
+registry.callback("aggregator_cache_bytes", "Approximate bytes held in the in-memory cache.", "gauge", lambda: cache.size_bytes)
+for _stat in ("hits", "stale_hits", "backend_hits", "misses", "evictions", "expirations"):
+    registry.callback(f"aggregator_cache_{_stat}_total", f"Score cache {_stat.replace('_', ' ')}.", "counter",
+                      lambda stat=_stat: getattr(cache, stat))
+registry.callback("aggregator_lookups_in_flight", "Distinct titles currently being looked up.", "gauge", lambda: len(inflight))
+registry.callback("aggregator_lookups_coalesced_total", "Requests that joined a lookup already in flight.", "counter",
+                  lambda: inflight.coalesced)
+registry.callback(
+    "aggregator_circuit_breaker_open", "1 while a source's circuit breaker is open or half-open.", "gauge",
+    lambda: {(source,): int(breaker.state != breaker.CLOSED) for source, breaker in breakers.items()}, ("source",)
+)
+registry.callback(
+    "aggregator_upstream_concurrency_limit", "Requests the rate governor currently lets in flight per upstream host.",
+    "gauge", lambda: {(host,): state["limit"] for host, state in upstream.governor.snapshot().items()}, ("host",)
+)
+registry.callback(
+    "aggregator_upstream_throttled_total", "Responses in which an upstream host asked us to slow down.", "counter",
+    lambda: {(host,): state["throttled"] for host, state in upstream.governor.snapshot().items()}, ("host",)
+)
+
 class MovieNotFoundException(Exception):
     """Custom exception for when a movie is not found"""
     pass
 
+class SourceSkippedException(Exception):
+    """
+    Raised when a source is left out of the aggregate. `reason` is the
+    response key the source is listed under.
+    """
+    reason = "skipped"
+
+    def __init__(self, source: str, detail: str):
+        super().__init__(detail)
+        self.source = source
+
+class SourceTimeoutException(SourceSkippedException):
+    """Raised when a source does not answer within its deadline"""
+    reason = "timed_out"
+
+    def __init__(self, source: str):
+        super().__init__(source, f"{source} did not answer within {SOURCE_DEADLINES[source]}s")
+
+class CircuitOpenException(SourceSkippedException):
+    """Raised instead of calling a source whose circuit breaker is open"""
+    reason = "circuit_open"
+
+    def __init__(self, source: str):
+        super().__init__(source, f"{source} is failing, skipped until its circuit breaker closes")
+
+class SourceThrottledException(SourceSkippedException):
+    """Raised when the rate governor would not let a source's requests through before its deadline"""
+    reason = "throttled"
+
+    def __init__(self, source: str):
+        super().__init__(source, f"{source} is rate limited, skipped until its cooldown passes")
+
+# Keys under which an aggregate lists the sources it had to leave out
+SKIP_REASONS = (SourceTimeoutException.reason, CircuitOpenException.reason, SourceThrottledException.reason)
+
 async def check_imdb_api() -> bool:
     try:
-        async with httpx.AsyncClient() as client:
-            omdb_key = os.getenv("OMDB_API_KEY")
-            response = await client.get(f"http://www.omdbapi.com/?i=tt3896198&apikey={omdb_key}")
-            return response.status_code == 200
+        omdb_key = os.getenv("OMDB_API_KEY")
+        response = await asyncio.to_thread(
+            upstream.get_session().get,
+            "http://www.omdbapi.com/",
+            params={"i": "tt3896198", "apikey": omdb_key}
+        )
+        return response.status_code == 200
     except:
         return False
 
+async def check_site(url: str) -> bool:
+    """Whether a scraped site answers its home page without an error status."""
+    response = await asyncio.to_thread(upstream.get_session().head, url, headers=REQUEST_HEADERS)
+    return response.status_code < 400
+
+async def check_letterboxd() -> bool:
+    return await check_site("https://letterboxd.com/")
+
+async def check_rotten_tomatoes() -> bool:
+    return await check_site("https://www.rottentomatoes.com/")
+
+# Upstream health is probed in the background, each on its own interval, and
+# the endpoints below only read the cached results. The OMDB probe spends API
+# quota, so it runs least often.
+prober = DependencyProber(timeout=float(os.getenv("PROBE_TIMEOUT_SECONDS", 10)))
+prober.register("imdb_api", lambda: check_imdb_api(), float(os.getenv("OMDB_PROBE_INTERVAL_SECONDS", 300)))
+prober.register("letterboxd_scraping", lambda: check_letterboxd(), float(os.getenv("SCRAPER_PROBE_INTERVAL_SECONDS", 60)))
+prober.register("rotten_tomatoes_scraping", lambda: check_rotten_tomatoes(), float(os.getenv("SCRAPER_PROBE_INTERVAL_SECONDS", 60)))
+
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    REQUESTS_IN_FLIGHT.inc()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        REQUESTS_IN_FLIGHT.dec()
+        # Label by route template, not raw path, so titles do not create new series
+        route = request.scope.get("route")
+        HTTP_REQUESTS.inc(method=request.method, route=route.path if route else "unmatched", status=status)
+
+@app.get("/metrics")
+async def metrics() -> PlainTextResponse:
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/livez")
+async def liveness_check() -> dict:
+    """The process is up and serving requests. Does no I/O."""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readiness_check() -> dict:
+    """
+    Ready once this process can serve: the lifespan has run, the upstream
+    session is open and the cache backend answers. Upstream health is only
+    reported by /health, as cached and partial results are still served
+    while a source is down.
+    """
+    checks = {
+        "started": getattr(app.state, "started", False),
+        "upstream_session": upstream.is_open(),
+        "cache_backend": await asyncio.to_thread(cache.backend_reachable),
+    }
+    if not all(checks.values()):
+        raise HTTPException(status_code=503, detail={"status": "not ready", "checks": checks})
+    return {"status": "ready", "checks": checks}
+
 @app.get("/health")
 async def health_check() -> dict:
     health_data = {
         "status": "healthy",
         "api_version": "1.0.0",
-        "dependencies": {
-            "imdb_api": await check_imdb_api(),
-            "letterboxd_scraping": True
-        }
+        "dependencies": {name: prober.is_healthy(name) for name in prober.dependencies},
+        "probes": prober.statuses,
+        "circuit_breakers": {source: breaker.snapshot() for source, breaker in breakers.items()},
+        "rate_governor": upstream.governor.snapshot(),
     }
+    if warmer is not None:
+        health_data["cache_warmer"] = warmer.status
     
     if not all(health_data["dependencies"].values()):
         health_data["status"] = "unhealthy"
         raise HTTPException(status_code=503, detail=health_data)
-        
+
     return health_data
 
-@app.get("/movie/{title}")
-async def get_movie_scores(title: str):
-    logger.info(f"Received request for movie: {title}")
+def require_admin(token):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    # Compared as bytes, since compare_digest rejects non-ASCII str
+    if token is None or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/admin/profile")
+async def capture_profile(
+    seconds: float = Query(10, gt=0),
+    interval: float = Query(0.005, ge=0.001, le=1),
+    format: str = Query("collapsed", pattern="^(collapsed|speedscope)$"),
+    x_admin_token: str = Header(None),
+) -> Response:
+    """
+    Samples every thread of this worker for `seconds` and returns the profile,
+    either as collapsed stacks or as a speedscope file. Only one profile runs
+    at a time.
+    """
+    require_admin(x_admin_token)
+    # Sample from a thread of its own, so the event loop keeps serving the traffic being profiled
+    future = profiling.start_profile(min(seconds, PROFILE_MAX_SECONDS), interval)
+    if future is None:
+        raise HTTPException(status_code=409, detail="A profile is already being captured")
+    result = await asyncio.wrap_future(future)
+    if format == "speedscope":
+        return Response(result.speedscope(), media_type="application/json",
+                        headers={"Content-Disposition": 'attachment; filename="profile.speedscope.json"'})
+    return PlainTextResponse(result.collapsed())
+
+def fetch_rotten_tomatoes(title: str) -> dict:
+    """Blocking Rotten Tomatoes lookup. Missing movies degrade to zero scores."""
     try:
-        # Check cache first
-        if title in cache:
-            if datetime.now() - cache[title]["timestamp"] < CACHE_DURATION:
-                return cache[title]["data"]
-        
-        title = title.lower()
-        # First try to get Letterboxd data
-        letterboxd_data = scrape_film(title,'.json')
-        if letterboxd_data is None:
-            raise MovieNotFoundException(f"Movie '{title}' not found on Letterboxd")
-
-        # Get Rotten Tomatoes data
-        try:
-            rt_movie = Movie(title)
+        # The search and page fetch are timed by the session, the parse is timed here.
+        # Both pages are only read until what is needed from them has arrived.
+        content = standalone._request(movie_name=title, session=upstream.get_session(), scores_only=True)
+        with timing.phase("rotten_tomatoes", "parse"):
+            # Movie extracts lazily, so the parse happens on these reads
+            rt_movie = Movie(title, content=content)
             rt_critic_score = rt_movie.tomatometer
             rt_audience_score = rt_movie.audience_score
-            # Use weighted score if possible but if it can't just use critic.
-            if rt_critic_score and rt_audience_score:
-                rt_score = rt_movie.weighted_score
-            elif rt_critic_score:
-                rt_score = rt_critic_score
-            elif rt_audience_score:
-                rt_score = rt_audience_score
-            else:
-                rt_score = 0
-        except LookupError:
-            logger.warning(f"Movie '{title}' not found on Rotten Tomatoes")
+        # Use weighted score if possible but if it can't just use critic.
+        if rt_critic_score and rt_audience_score:
+            rt_score = rt_movie.weighted_score
+        elif rt_critic_score:
+            rt_score = rt_critic_score
+        elif rt_audience_score:
+            rt_score = rt_audience_score
+        else:
             rt_score = 0
-            rt_critic_score = 0
-            rt_audience_score = 0
+    except LookupError:
+        logger.warning(f"Movie '{title}' not found on Rotten Tomatoes")
+        rt_score = 0
+        rt_critic_score = 0
+        rt_audience_score = 0
+
+    return {
+        "critic_score": rt_critic_score,
+        "audience_score": rt_audience_score,
+        "aggregate_score": rt_score
+    }
+
+def fetch_omdb(title: str, omdb_key: str) -> tuple:
+    """Blocking OMDB lookup. Returns the status code and the decoded body."""
+    omdb_response = upstream.get_session().get(
+        "http://www.omdbapi.com/",
+        params={"t": title, "apikey": omdb_key}
+    )
+    return omdb_response.status_code, omdb_response.json()
+
+async def run_lookup(fn, *args, **kwargs):
+    """Runs a blocking lookup on the lookup pool, carrying the caller's deadline and timing spans into it."""
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        lookup_executor, functools.partial(context.run, fn, *args, **kwargs)
+    )
+
+async def lookup_letterboxd(title: str) -> dict:
+    letterboxd_data = await run_lookup(scrape_film, title, '.json', session=upstream.get_session())
+    if letterboxd_data is None:
+        raise MovieNotFoundException(f"Movie '{title}' not found on Letterboxd")
+
+    # Films nobody has rated yet have no average. 0 leaves the source out of the aggregate.
+    letterboxd_score = letterboxd_data.get("Average_rating") or 0
+    return {"letterboxd_score": letterboxd_score * 20}  # Convert to percentage
+
+async def lookup_rotten_tomatoes(title: str) -> dict:
+    return await run_lookup(fetch_rotten_tomatoes, title)
+
+async def lookup_imdb(title: str, omdb_key: str) -> dict:
+    omdb_status, omdb_data = await run_lookup(fetch_omdb, title, omdb_key)
+
+    # Check for OMDB errors
+    if "Error" in omdb_data or omdb_status != 200:
+        raise MovieNotFoundException(f"Movie '{title}' not found on IMDB")
+
+    # Get IMDb rating
+    imdb_rating = omdb_data.get("imdbRating")
+    if not imdb_rating or imdb_rating == "N/A":
+        imdb_score = 0
+    else:
+        imdb_score = (float(imdb_rating) / 10) * 100
+
+    return {
+        "title": omdb_data.get("Title"),
+        "imdb_score": imdb_score,
+        "year": omdb_data.get("Year"),
+        "poster": omdb_data.get("Poster")
+    }
+
+async def guarded(source: str, lookup) -> dict:
+    """
+    Runs a source lookup behind its circuit breaker and deadline. Not finding
+    the movie counts as a healthy answer, errors and timeouts count against
+    the source. Being held back by our own rate governor counts as neither.
+    """
+    breaker = breakers[source]
+    if not breaker.allow():
+        lookup.close()
+        SOURCE_SECONDS.observe(0, source=source, outcome="circuit_open")
+        raise CircuitOpenException(source)
+
+    start = time.perf_counter()
+    try:
+        # Upstream requests are capped to the deadline too, so the thread is
+        # not left waiting on a response nobody will read
+        with upstream.deadline(SOURCE_DEADLINES[source]):
+            result = await asyncio.wait_for(lookup, SOURCE_DEADLINES[source])
+    except asyncio.TimeoutError:
+        breaker.record_failure()
+        SOURCE_SECONDS.observe(time.perf_counter() - start, source=source, outcome="timed_out")
+        logger.warning(f"{source} missed its {SOURCE_DEADLINES[source]}s deadline")
+        raise SourceTimeoutException(source)
+    except MovieNotFoundException:
+        breaker.record_success(time.perf_counter() - start)
+        SOURCE_SECONDS.observe(time.perf_counter() - start, source=source, outcome="not_found")
+        raise
+    except Exception as e:
+        if _caused_by(e, upstream.Throttled):
+            SOURCE_SECONDS.observe(time.perf_counter() - start, source=source, outcome="throttled")
+            logger.warning(f"{source} skipped, its rate limit would not let it through in time")
+            raise SourceThrottledException(source) from e
+        breaker.record_failure()
+        if _caused_by(e, upstream.DeadlineExceeded):
+            SOURCE_SECONDS.observe(time.perf_counter() - start, source=source, outcome="timed_out")
+            logger.warning(f"{source} missed its {SOURCE_DEADLINES[source]}s deadline")
+            raise SourceTimeoutException(source) from e
+        SOURCE_SECONDS.observe(time.perf_counter() - start, source=source, outcome="error")
+        raise
+    breaker.record_success(time.perf_counter() - start)
+    SOURCE_SECONDS.observe(time.perf_counter() - start, source=source, outcome="ok")
+    return result
+
+def _caused_by(error: BaseException, kind: type) -> bool:
+    """Whether `error`, or an exception it was raised from or while handling, is a `kind`."""
+    while error is not None:
+        if isinstance(error, kind):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+def source_lookups(title: str, omdb_key: str) -> dict:
+    """One pending lookup per source, keyed by the name the source is reported under."""
+    return {
+        "letterboxd": guarded("letterboxd", lookup_letterboxd(title)),
+        "rotten_tomatoes": guarded("rotten_tomatoes", lookup_rotten_tomatoes(title)),
+        "imdb": guarded("imdb", lookup_imdb(title, omdb_key)),
+    }
+
+def build_aggregate(imdb: dict, letterboxd: dict, rotten_tomatoes: dict,
+                    skipped: Dict[str, List[str]] = None) -> dict:
+    """
+    Combines the per-source results into the response served for a movie.
+    `skipped` maps a reason such as "timed_out" to the sources it applies
+    to. Those sources must be passed as their SKIPPED_RESULTS entry.
+    """
+    # Calculate aggregate score (average of all available scores)
+    scores = [imdb["imdb_score"], letterboxd["letterboxd_score"], rotten_tomatoes["aggregate_score"]]
+    available_scores = [score for score in scores if score != 0]
+    final_aggregate = sum(available_scores) / len(available_scores) if available_scores else 0
+
+    aggregate_score = {
+        "title": imdb["title"],
+        "imdb_score": imdb["imdb_score"],
+        "letterboxd_score": letterboxd["letterboxd_score"],
+        "rotten_tomatoes": rotten_tomatoes,
+        "aggregate_score": round(final_aggregate, 2),
+        "year": imdb["year"],
+        "poster": imdb["poster"]
+    }
+    for reason, sources in (skipped or {}).items():
+        aggregate_score[reason] = list(sources)
+    return aggregate_score
+
+async def compute_scores(title: str, omdb_key: str, on_result=None) -> dict:
+    """
+    Looks `title` up on every source, aggregates the scores and caches the
+    result. `on_result(source, result_or_exception)` is called as each source
+    finishes, before the aggregate is built.
+    """
+    async def reported(source: str, lookup):
+        try:
+            result = await lookup
+        except Exception as e:
+            on_result(source, e)
+            raise
+        on_result(source, result)
+        return result
+
+    # All three lookups block on network I/O, so run them side by side in
+    # worker threads instead of one after another on the event loop.
+    lookups = source_lookups(title, omdb_key)
+    if on_result is not None:
+        lookups = {source: reported(source, lookup) for source, lookup in lookups.items()}
+    results = dict(zip(lookups, await asyncio.gather(*lookups.values(), return_exceptions=True)))
+
+    # Report failures in source order rather than whichever happened first
+    skipped = {}
+    for source, result in results.items():
+        if isinstance(result, SourceSkippedException):
+            skipped.setdefault(result.reason, []).append(source)
+            results[source] = SKIPPED_RESULTS[source]
+        elif isinstance(result, BaseException):
+            raise result
+
+    if sum(len(sources) for sources in skipped.values()) == len(results):
+        if "timed_out" in skipped:
+            raise HTTPException(status_code=504, detail=f"No source answered for '{title}' in time")
+        raise HTTPException(status_code=503, detail=f"Every source for '{title}' is currently unavailable")
 
-        # Get OMDB data
+    with timing.span("aggregate"):
+        aggregate_score = build_aggregate(**results, skipped=skipped)
+
+    # Cache the result. Partial results are not cached, the next request retries the missing sources.
+    if not skipped:
+        cache.set(title, aggregate_score, wait=False)
+
+    return aggregate_score
+
+async def load_warm_titles() -> List[str]:
+    """The titles to keep warm: those in WARM_TITLES_FILE, then those on WARM_LETTERBOXD_LIST."""
+    titles = []
+    if WARM_TITLES_FILE:
+        with open(WARM_TITLES_FILE, encoding="utf-8") as f:
+            titles.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    if WARM_LETTERBOXD_LIST:
+        titles.extend(await run_lookup(scrape_list_titles, WARM_LETTERBOXD_LIST, WARM_LIST_PAGES,
+                                       session=upstream.get_session()))
+    return [normalize_title(title) for title in titles][:WARM_MAX_TITLES]
+
+async def stays_fresh(title: str) -> bool:
+    """Whether the cached scores for `title` will still be fresh when the warmer next runs."""
+    age = await asyncio.to_thread(cache.age_of, title)
+    return age is not None and age + WARM_INTERVAL < CACHE_DURATION.total_seconds()
+
+async def warm_scores(title: str) -> None:
+    omdb_key = os.getenv("OMDB_API_KEY")
+    if not omdb_key:
+        raise HTTPException(status_code=500, detail="OMDB API key not configured")
+    # Joins a lookup a client already started rather than repeating it
+    await inflight.do(title, lambda: compute_scores(title, omdb_key))
+
+# The cache is warmed for the titles in WARM_TITLES_FILE (one per line) and on
+# the Letterboxd list at WARM_LETTERBOXD_LIST, at startup and then every
+# WARM_INTERVAL_SECONDS, which defaults to well inside the cache TTL. Titles
+# are looked up WARM_CONCURRENCY at a time, starting at most WARM_RATE a
+# second, and their upstream requests go through the same rate governor as
+# client traffic. Titles still fresh at the next run are not looked up again.
+WARM_TITLES_FILE = os.getenv("WARM_TITLES_FILE")
+WARM_LETTERBOXD_LIST = os.getenv("WARM_LETTERBOXD_LIST")
+WARM_LIST_PAGES = int(os.getenv("WARM_LIST_PAGES", 20))
+WARM_MAX_TITLES = int(os.getenv("WARM_MAX_TITLES", 2000))
+WARM_INTERVAL = float(os.getenv("WARM_INTERVAL_SECONDS", CACHE_DURATION.total_seconds() * 0.75))
+WARM_CONCURRENCY = int(os.getenv("WARM_CONCURRENCY", 4))
+WARM_RATE = float(os.getenv("WARM_RATE", 1))
+warmer = None
+if WARM_TITLES_FILE or WARM_LETTERBOXD_LIST:
+    warmer = CacheWarmer(load_warm_titles, stays_fresh, warm_scores, interval=WARM_INTERVAL,
+                         concurrency=WARM_CONCURRENCY, rate=WARM_RATE,
+                         # Workers sharing the SQLite cache take turns rather than all warming it
+                         lock_path=f"{CACHE_DB_PATH}.warm.lock" if CACHE_BACKEND == "sqlite" else None)
+    registry.callback(
+        "aggregator_cache_warm_titles_total", "Titles handled by the cache warmer, by outcome.", "counter",
+        lambda: {(outcome,): count for outcome, count in warmer.totals.items()}, ("outcome",)
+    )
+
+async def refresh_scores(title: str, omdb_key: str) -> None:
+    """Recomputes a stale cache entry in the background."""
+    try:
+        await inflight.do(title, lambda: compute_scores(title, omdb_key))
+    except Exception as e:
+        logger.warning(f"Background refresh failed for '{title}': {str(e)}")
+
+@app.get("/movie/{title}")
+async def get_movie_scores(title: str, background_tasks: BackgroundTasks,
+                           if_none_match: Optional[str] = Header(None)):
+    """
+    Aggregated scores for a movie. Responses carry an ETag of the body and
+    may be cached until the cache entry they came from goes stale. A request
+    whose If-None-Match still matches gets a 304 without any upstream call.
+    """
+    logger.info(f"Received request for movie: {title}")
+    recorder = timing.start_recording()
+    try:
         omdb_key = os.getenv("OMDB_API_KEY")
         if not omdb_key:
             raise HTTPException(status_code=500, detail="OMDB API key not configured")
 
-        omdb_response = get(f"http://www.omdbapi.com/?t={title}&apikey={omdb_key}")
-        omdb_data = omdb_response.json()
-        
-        # Check for OMDB errors
-        if "Error" in omdb_data or omdb_response.status_code != 200:
-            raise MovieNotFoundException(f"Movie '{title}' not found on IMDB")
-
-        # Get IMDb rating
-        imdb_rating = omdb_data.get("imdbRating")
-        if not imdb_rating or imdb_rating == "N/A":
-            imdb_score = 0
-        else:
-            imdb_score = (float(imdb_rating) / 10) * 100
-
-        letterboxd_score = letterboxd_data.get("Average_rating")
-        
-        # Calculate aggregate score (average of all available scores)
-        available_scores = [score for score in [imdb_score, letterboxd_score * 20, rt_score] if score != 0]
-        final_aggregate = sum(available_scores) / len(available_scores) if available_scores else 0
-        
-        aggregate_score = {
-            "title": omdb_data.get("Title"),
-            "imdb_score": imdb_score,
-            "letterboxd_score": letterboxd_score * 20,  # Convert to percentage
-            "rotten_tomatoes": {
-                "critic_score": rt_critic_score,
-                "audience_score": rt_audience_score,
-                "aggregate_score": rt_score
-            },
-            "aggregate_score": round(final_aggregate, 2),
-            "year": omdb_data.get("Year"),
-            "poster": omdb_data.get("Poster")
-        }
-        
-        # Cache the result
-        cache[title] = {
-            "timestamp": datetime.now(),
-            "data": aggregate_score
-        }
-        
-        return aggregate_score
-        
-    except MovieNotFoundException as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except HTTPException as e:
-        raise
+        # Check cache first. Stale entries are served straight away and refreshed
+        # after the response has been sent.
+        title = normalize_title(title)
+        with timing.span("cache"):
+            entry = await cache.lookup_async(title)
+        if entry is not None:
+            stale = cache.is_stale(entry)
+            if stale:
+                background_tasks.add_task(refresh_scores, title, omdb_key)
+            # The body was encoded when the entry was cached, so a hit encodes nothing
+            return conditional_response(entry.body, entry.etag, if_none_match, {
+                "Age": str(int(entry.age)),
+                "Cache-Control": f"public, max-age={max(0, int(CACHE_DURATION.total_seconds() - entry.age))}",
+                "X-Cache": "STALE" if stale else "HIT",
+                "Server-Timing": recorder.header(),
+            })
+
+        # Concurrent misses for the same title share a single lookup. Only the
+        # request that started it sees the per-source phases.
+        with timing.span("lookup"):
+            aggregate_score = await inflight.do(title, lambda: compute_scores(title, omdb_key))
+        body = serialization.dumps(aggregate_score)
+        # Partial aggregates are not cached here either, so clients must not keep them
+        partial = any(reason in aggregate_score for reason in SKIP_REASONS)
+        return conditional_response(body, body_etag(body), if_none_match, {
+            "Cache-Control": "no-cache" if partial else f"public, max-age={int(CACHE_DURATION.total_seconds())}",
+            "X-Cache": "MISS",
+            "Server-Timing": recorder.header(),
+        })
+
     except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
+        # Failed lookups are the slow ones worth breaking down. A new exception,
+        # as coalesced requests share the one their lookup raised.
+        error = as_http_exception(e)
+        raise HTTPException(status_code=error.status_code, detail=error.detail,
+                            headers={**(error.headers or {}), "Server-Timing": recorder.header()})
+
+def json_response(body: bytes, headers: Dict[str, str]) -> Response:
+    """Serves an already encoded JSON body as is. Content-Length is set from the bytes."""
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison, so W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+def conditional_response(body: bytes, etag: str, if_none_match: Optional[str], headers: Dict[str, str]) -> Response:
+    """The JSON body with its ETag, or an empty 304 when the client already holds it."""
+    headers = {**headers, "ETag": etag}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return json_response(body, headers)
+
+def as_http_exception(e: Exception) -> HTTPException:
+    """Maps a lookup failure onto the HTTP error the API reports for it."""
+    if isinstance(e, MovieNotFoundException):
+        return HTTPException(status_code=404, detail=str(e))
+    if isinstance(e, HTTPException):
+        return e
+    logger.error(f"Unexpected error: {str(e)}")
+    return HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
+
+class MovieBatch(BaseModel):
+    titles: List[str] = Field(min_length=1, max_length=BATCH_MAX_TITLES)
+
+@app.post("/movies")
+async def get_many_movie_scores(batch: MovieBatch, background_tasks: BackgroundTasks):
+    """
+    Scores every title in the batch and streams one JSON object per line as
+    each finishes. Cached titles come first, misses are fetched at most
+    BATCH_CONCURRENCY at a time.
+    """
+    omdb_key = os.getenv("OMDB_API_KEY")
+    if not omdb_key:
+        raise HTTPException(status_code=500, detail="OMDB API key not configured")
+
+    # Duplicate titles (in any casing) are only looked up once
+    titles = {}
+    for title in batch.titles:
+        titles.setdefault(normalize_title(title), title)
+
+    def line(title: str, status: int, body) -> bytes:
+        result = {"title": title, "status": status}
+        result["data" if status == 200 else "detail"] = body
+        return serialization.dumps(result) + b"\n"
+
+    def cached_line(title: str, entry) -> bytes:
+        # Splice in the body encoded when the entry was cached instead of encoding its data again
+        return serialization.dumps({"title": title, "status": 200})[:-1] + b',"data":' + entry.body + b"}\n"
+
+    async def fetch(key: str) -> bytes:
+        async with semaphore:
+            try:
+                return line(titles[key], 200, await inflight.do(key, lambda: compute_scores(key, omdb_key)))
+            except Exception as e:
+                error = as_http_exception(e)
+                return line(titles[key], error.status_code, error.detail)
+
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def stream():
+        misses = []
+        for key, title in titles.items():
+            entry = await cache.lookup_async(key)
+            if entry is None:
+                misses.append(key)
+                continue
+            if cache.is_stale(entry):
+                background_tasks.add_task(refresh_scores, key, omdb_key)
+            yield cached_line(title, entry)
+
+        for finished in asyncio.as_completed([fetch(key) for key in misses]):
+            yield await finished
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson", background=background_tasks)
+
+def sse_event(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+@app.get("/movie/{title}/stream")
+async def stream_movie_scores(title: str, background_tasks: BackgroundTasks):
+    """
+    Server-Sent Events variant of /movie/{title}. Emits an `imdb`,
+    `letterboxd` and `rotten_tomatoes` event as each source answers, then an
+    `aggregate` event with the same body /movie/{title} returns. A source
+    that misses its deadline, whose circuit breaker is open or that the rate
+    governor holds back emits a `timed_out`, `circuit_open` or `throttled`
+    event and is left out of the aggregate. A
+    source that fails emits an `error` event instead, and no aggregate follows.
+
+    Cached titles, and titles another request is already looking up, are
+    replayed from the finished aggregate instead.
+    """
+    omdb_key = os.getenv("OMDB_API_KEY")
+    if not omdb_key:
+        raise HTTPException(status_code=500, detail="OMDB API key not configured")
+    title = normalize_title(title)
+
+    def source_event(source: str, result) -> bytes:
+        if isinstance(result, SourceSkippedException):
+            return sse_event(result.reason, {"source": source, "detail": str(result)})
+        if isinstance(result, Exception):
+            error = as_http_exception(result)
+            return sse_event("error", {"source": source, "status": error.status_code, "detail": error.detail})
+        return sse_event(source, result)
+
+    def replay(data: dict):
+        yield sse_event("imdb", {key: data[key] for key in ("title", "imdb_score", "year", "poster")})
+        yield sse_event("letterboxd", {"letterboxd_score": data["letterboxd_score"]})
+        yield sse_event("rotten_tomatoes", data["rotten_tomatoes"])
+        yield sse_event("aggregate", data)
+
+    async def events():
+        entry = await cache.lookup_async(title)
+        if entry is not None:
+            if cache.is_stale(entry):
+                background_tasks.add_task(refresh_scores, title, omdb_key)
+            for event in replay(entry.data):
+                yield event
+            return
+
+        # The lookup goes through the same single-flight as /movie/{title}. Only
+        # the request that starts it sees the sources answer one by one.
+        finished = asyncio.Queue()
+        flight, leader = inflight.start(
+            title, lambda: compute_scores(title, omdb_key, on_result=lambda *result: finished.put_nowait(result))
+        )
+        reported = 0
+        if leader:
+            for _ in SOURCE_DEADLINES:
+                # Every result is queued before the lookup finishes, so once it
+                # has finished an empty queue means nothing more is coming
+                result = asyncio.ensure_future(finished.get())
+                try:
+                    await asyncio.wait({result, flight}, return_when=asyncio.FIRST_COMPLETED)
+                    if not result.done():
+                        break
+                finally:
+                    if not result.done():
+                        result.cancel()
+                yield source_event(*result.result())
+                reported += 1
+        try:
+            aggregate_score = await asyncio.shield(flight)
+        except Exception as e:
+            # Unless the lookup failed before every source answered, the leader
+            # has already reported every failed or skipped source
+            if not leader or reported < len(SOURCE_DEADLINES):
+                error = as_http_exception(e)
+                yield sse_event("error", {"status": error.status_code, "detail": error.detail})
+            return
+        if leader:
+            yield sse_event("aggregate", aggregate_score)
+        else:
+            for event in replay(aggregate_score):
+                yield event
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"},
+                             background=background_tasks)
 
 @app.get("/")
 async def root():
@@ -0,0 +1,97 @@
+"""Circuit breaker that stops calling an upstream while it keeps failing."""
+import threading
+import time
+from collections import deque
+from typing import Dict
+
+
+class CircuitBreaker:
+    """
+    Tracks the outcome of the last `window` calls to one upstream. Once at
+    least `min_calls` have been made and the share of failures reaches
+    `failure_rate`, the breaker opens and `allow()` refuses calls. Calls
+    slower than `slow_call_seconds` count as failures.
+
+    After `reset_timeout` seconds an open breaker goes half-open and lets a
+    single probe call through. The probe closes the breaker if it succeeds and
+    re-opens it if it fails.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, window: int = 20, min_calls: int = 5, failure_rate: float = 0.5,
+                 slow_call_seconds: float = 5.0, reset_timeout: float = 30.0) -> None:
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.probe_started_at = None
+        self.times_opened = 0
+        self._outcomes = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go through right now."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if now - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+            # Half-open: one probe at a time. A probe that never reported back
+            # is given up on after reset_timeout.
+            if self.probe_started_at is not None and now - self.probe_started_at < self.reset_timeout:
+                return False
+            self.probe_started_at = now
+            return True
+
+    def record_success(self, latency: float) -> None:
+        if latency >= self.slow_call_seconds:
+            self.record_failure()
+            return
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.CLOSED
+                self.probe_started_at = None
+                self._outcomes.clear()
+            self._outcomes.append(False)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._open()
+                return
+            self._outcomes.append(True)
+            if len(self._outcomes) >= self.min_calls and self._failure_share() >= self.failure_rate:
+                self._open()
+
+    def _open(self) -> None:
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.probe_started_at = None
+        self.times_opened += 1
+
+    def _failure_share(self) -> float:
+        return sum(self._outcomes) / len(self._outcomes) if self._outcomes else 0.0
+
+    def reset(self) -> None:
+        """Closes the breaker and forgets every recorded call."""
+        with self._lock:
+            self.state = self.CLOSED
+            self.probe_started_at = None
+            self._outcomes.clear()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "recent_calls": len(self._outcomes),
+                "failure_rate": round(self._failure_share(), 3),
+                "times_opened": self.times_opened,
+            }
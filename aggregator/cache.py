@@ -0,0 +1,344 @@
+"""Cache for aggregated movie scores: a bounded in-memory LRU in front of a pluggable backend."""
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, Optional
+
+from aggregator import serialization
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_title(title: str) -> str:
+    """Cache key for a title: lowercased with runs of whitespace collapsed."""
+    return " ".join(title.lower().split())
+
+
+def body_etag(body: bytes) -> str:
+    """Strong ETag for a response body: a hash of its exact bytes."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+class CacheEntry:
+    """
+    A cached response together with when it was stored and how many bytes it
+    accounts for. `body` is `data` already encoded as JSON, so hits can be
+    served without encoding them again, and `etag` identifies that body.
+    """
+    __slots__ = ("data", "body", "etag", "stored_at", "size")
+
+    def __init__(self, data: dict, stored_at: float, size: int, body: Optional[bytes] = None) -> None:
+        self.data = data
+        self.body = serialization.dumps(data) if body is None else body
+        self.etag = body_etag(self.body)
+        self.stored_at = stored_at
+        self.size = size
+
+    @property
+    def age(self) -> float:
+        """Seconds since the entry was stored."""
+        return time.time() - self.stored_at
+
+
+class CacheBackend:
+    """
+    Storage behind the in-memory cache. Backends only store and load entries;
+    freshness and eviction decisions stay in `ScoreCache`.
+    """
+
+    def load(self, key: str) -> Optional[CacheEntry]:
+        raise NotImplementedError
+
+    def store(self, key: str, entry: CacheEntry) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def prune(self, max_age: float, max_entries: int) -> None:
+        """Drops entries older than `max_age` seconds and all but the newest `max_entries`."""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def ping(self) -> None:
+        """Raises if the backend cannot be read right now."""
+        raise NotImplementedError
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Stores entries in a local SQLite database in WAL mode, so every worker
+    process on the host reads and writes one cache and it survives restarts.
+    Connections are opened lazily per thread and per process, which keeps the
+    backend safe to create before gunicorn forks its workers.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS scores ("
+                "key TEXT PRIMARY KEY, data TEXT NOT NULL, stored_at REAL NOT NULL, size INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS scores_stored_at ON scores (stored_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def load(self, key: str) -> Optional[CacheEntry]:
+        row = self._connect().execute(
+            "SELECT data, stored_at, size FROM scores WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(serialization.loads(row[0]), row[1], row[2], body=row[0].encode())
+
+    def store(self, key: str, entry: CacheEntry) -> None:
+        self._connect().execute(
+            "INSERT OR REPLACE INTO scores (key, data, stored_at, size) VALUES (?, ?, ?, ?)",
+            (key, entry.body.decode(), entry.stored_at, entry.size),
+        )
+
+    def delete(self, key: str) -> None:
+        self._connect().execute("DELETE FROM scores WHERE key = ?", (key,))
+
+    def prune(self, max_age: float, max_entries: int) -> None:
+        conn = self._connect()
+        conn.execute("DELETE FROM scores WHERE stored_at < ?", (time.time() - max_age,))
+        conn.execute(
+            "DELETE FROM scores WHERE key NOT IN (SELECT key FROM scores ORDER BY stored_at DESC LIMIT ?)",
+            (max_entries,),
+        )
+
+    def clear(self) -> None:
+        self._connect().execute("DELETE FROM scores")
+
+    def ping(self) -> None:
+        self._connect().execute("SELECT 1 FROM scores LIMIT 1").fetchall()
+
+
+class ScoreCache:
+    """
+    TTL cache with least-recently-used eviction, bounded both by number of
+    entries and by the approximate size of the cached payloads in bytes.
+    Keys are normalized with `normalize_title`, so lookups are case insensitive.
+
+    Entries older than `ttl` are stale. They are kept for a further
+    `stale_grace` so callers can serve them while a refresh runs.
+
+    With a `backend`, every write goes through to it and in-memory misses
+    fall back to it. Set `use_l1=False` to skip the in-memory layer entirely.
+    """
+
+    # Prune the backend once every this many writes
+    PRUNE_EVERY = 256
+
+    def __init__(self, ttl: timedelta = timedelta(hours=24), max_entries: int = 2048,
+                 max_bytes: int = 32 * 1024 * 1024, stale_grace: timedelta = timedelta(0),
+                 backend: Optional[CacheBackend] = None, use_l1: bool = True) -> None:
+        self.ttl = ttl
+        self.stale_grace = stale_grace
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.backend = backend
+        self.use_l1 = use_l1
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        # Backend writes queued by `set(wait=False)` run here, one at a time and in order
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache-writer")
+        self.hits = 0
+        self.stale_hits = 0
+        self.backend_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, title: str) -> Optional[dict]:
+        """Returns the cached data for `title`, or None if it is missing or stale."""
+        entry = self.lookup(title)
+        if entry is None or self.is_stale(entry):
+            return None
+        return entry.data
+
+    def lookup(self, title: str) -> Optional[CacheEntry]:
+        """
+        Returns the entry for `title` if it is fresh or still inside the stale
+        grace window. Blocks on the backend when the in-memory entry is missing
+        or stale; on the event loop use `lookup_async`.
+        """
+        key = normalize_title(title)
+        stored = None
+        # Another worker may already have refreshed what is stale here
+        if self.backend is not None and not self._fresh_in_memory(key):
+            stored = self._load(key)
+        return self._resolve(key, stored)
+
+    async def lookup_async(self, title: str) -> Optional[CacheEntry]:
+        """`lookup` for the event loop. Only a read from the backend goes to a worker thread."""
+        key = normalize_title(title)
+        if self.backend is None or self._fresh_in_memory(key):
+            return self._resolve(key, None)
+        return self._resolve(key, await asyncio.to_thread(self._load, key))
+
+    def _fresh_in_memory(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry.age < self.ttl.total_seconds()
+
+    def _load(self, key: str) -> Optional[CacheEntry]:
+        # An unreachable backend degrades to a miss rather than failing the request
+        try:
+            return self.backend.load(key)
+        except Exception as e:
+            logger.warning(f"Cache backend read for '{key}' failed: {str(e)}")
+            return None
+
+    def _resolve(self, key: str, stored: Optional[CacheEntry]) -> Optional[CacheEntry]:
+        """Picks the newer of the in-memory entry and `stored`, and updates the stats."""
+        max_age = (self.ttl + self.stale_grace).total_seconds()
+        with self._lock:
+            entry = self._entries.get(key)
+            if stored is not None and (entry is None or stored.stored_at > entry.stored_at):
+                entry = stored
+                self.backend_hits += 1
+                if self.use_l1 and stored.age < max_age:
+                    self._insert(key, stored)
+            if entry is None:
+                self.misses += 1
+                return None
+            age = entry.age
+            if age >= max_age:
+                if key in self._entries:
+                    self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            if age >= self.ttl.total_seconds():
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def backend_reachable(self) -> bool:
+        """Whether the backend answers a read. Always true without a backend."""
+        if self.backend is None:
+            return True
+        try:
+            self.backend.ping()
+            return True
+        except Exception as e:
+            logger.warning(f"Cache backend is unreachable: {str(e)}")
+            return False
+
+    def age_of(self, title: str) -> Optional[float]:
+        """
+        Age of the newest entry for `title`, or None when there is none. Counts
+        neither a hit nor a miss and does not touch recency. Blocks on the backend.
+        """
+        key = normalize_title(title)
+        with self._lock:
+            entry = self._entries.get(key)
+        if self.backend is not None:
+            stored = self._load(key)
+            if stored is not None and (entry is None or stored.stored_at > entry.stored_at):
+                entry = stored
+        return None if entry is None else entry.age
+
+    def is_stale(self, entry: CacheEntry) -> bool:
+        return entry.age >= self.ttl.total_seconds()
+
+    def set(self, title: str, data: dict, wait: bool = True) -> None:
+        """
+        Stores `data` under `title`, evicting least recently used entries to
+        stay within bounds. With `wait=False` the backend write is queued on
+        the cache's writer thread, so the event loop never waits on it.
+        """
+        key = normalize_title(title)
+        body = serialization.dumps(data)
+        entry = CacheEntry(data, time.time(), len(key) + len(body), body=body)
+        with self._lock:
+            if self.use_l1 and entry.size <= self.max_bytes:
+                self._insert(key, entry)
+        if self.backend is None:
+            return
+        if wait:
+            self._store(key, entry)
+        else:
+            self._writer.submit(self._store, key, entry)
+
+    def _store(self, key: str, entry: CacheEntry) -> None:
+        # The response has already been computed, so a failed write is only logged
+        try:
+            self.backend.store(key, entry)
+            with self._lock:
+                self._writes += 1
+                prune = self._writes % self.PRUNE_EVERY == 0
+            if prune:
+                self.backend.prune((self.ttl + self.stale_grace).total_seconds(), self.max_entries)
+        except Exception as e:
+            logger.warning(f"Cache backend write for '{key}' failed: {str(e)}")
+
+    def _insert(self, key: str, entry: CacheEntry) -> None:
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.backend is not None:
+            # Queued behind any pending writes, so none of them lands after the clear
+            self._writer.submit(self.backend.clear).result()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, title: str) -> bool:
+        return normalize_title(title) in self._entries
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "backend_hits": self.backend_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,166 @@
+"""Per-host rate governor for upstream requests: token bucket, adaptive concurrency and shared cooldowns."""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class HostLimiter:
+    """
+    Paces requests to one host. A token bucket refilled at `rate` per second
+    (holding at most `burst`) caps the request rate, and an AIMD limit caps
+    how many requests are in flight: it grows by about one per round of
+    successful requests and halves whenever the host throttles us. While a
+    cooldown (e.g. from Retry-After) runs, nothing is sent at all.
+    """
+
+    def __init__(self, rate: float, burst: float, max_concurrency: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.limit = float(max_concurrency)
+        self.tokens = float(burst)
+        self.active = 0
+        self.cooldown_until = 0.0
+        self.throttled = 0
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits for a token and a free slot. Returns False without waiting when
+        it could not get both within `timeout` seconds.
+        """
+        give_up = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.cooldown_until:
+                    wait = self.cooldown_until - now
+                elif self.active >= int(self.limit):
+                    wait = None  # until a request finishes
+                elif self.tokens < 1:
+                    wait = (1 - self.tokens) / self.rate
+                else:
+                    self.tokens -= 1
+                    self.active += 1
+                    return True
+                if give_up is not None:
+                    left = give_up - now
+                    if left <= 0 or (wait is not None and wait > left):
+                        return False
+                    wait = left if wait is None else wait
+                self._cond.wait(wait)
+
+    def release(self, throttled: bool = False) -> None:
+        """Frees the slot. `throttled` means the host pushed back (429 or 5xx), which halves the limit."""
+        with self._cond:
+            self.active -= 1
+            if throttled:
+                self.throttled += 1
+                self.limit = max(1.0, self.limit / 2)
+            else:
+                self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def cool_down(self, until: float) -> None:
+        """Sends nothing to the host before `until` (a `time.monotonic()` value)."""
+        with self._cond:
+            if until > self.cooldown_until:
+                self.cooldown_until = until
+                self.tokens = 0
+            self._cond.notify_all()
+
+
+class SQLiteCooldowns:
+    """
+    Cooldowns kept in a local SQLite database, so every worker process on the
+    host backs off as soon as one of them is told to. Stored as wall-clock
+    times, as monotonic clocks are not comparable between processes.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._local = threading.local()
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS upstream_cooldowns (host TEXT PRIMARY KEY, until REAL NOT NULL)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, host: str) -> float:
+        row = self._connect().execute("SELECT until FROM upstream_cooldowns WHERE host = ?", (host,)).fetchone()
+        return row[0] if row else 0.0
+
+    def set(self, host: str, until: float) -> None:
+        self._connect().execute(
+            "INSERT INTO upstream_cooldowns (host, until) VALUES (?, ?) "
+            "ON CONFLICT(host) DO UPDATE SET until = max(until, excluded.until)",
+            (host, until),
+        )
+
+
+class RateGovernor:
+    """One `HostLimiter` per upstream host, created on first use, plus optional cooldowns shared between processes."""
+
+    def __init__(self, rate: float, burst: float, max_concurrency: int,
+                 shared: Optional[SQLiteCooldowns] = None) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.shared = shared
+        self._limiters: Dict[str, HostLimiter] = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, host: str) -> HostLimiter:
+        limiter = self._limiters.get(host)
+        if limiter is None:
+            with self._lock:
+                limiter = self._limiters.setdefault(host, HostLimiter(self.rate, self.burst, self.max_concurrency))
+        return limiter
+
+    def acquire(self, host: str, timeout: Optional[float] = None) -> bool:
+        limiter = self.limiter(host)
+        if self.shared is not None:
+            try:
+                wait = self.shared.get(host) - time.time()
+            except sqlite3.Error as e:
+                logger.warning(f"Reading the shared cooldown for {host} failed: {str(e)}")
+                wait = 0
+            if wait > 0:
+                limiter.cool_down(time.monotonic() + wait)
+        return limiter.acquire(timeout)
+
+    def release(self, host: str, throttled: bool = False) -> None:
+        self.limiter(host).release(throttled)
+
+    def cool_down(self, host: str, seconds: float) -> None:
+        """Pauses every request to `host` for `seconds`, in this process and, if shared, in the others."""
+        self.limiter(host).cool_down(time.monotonic() + seconds)
+        if self.shared is not None:
+            try:
+                self.shared.set(host, time.time() + seconds)
+            except sqlite3.Error as e:
+                logger.warning(f"Sharing the cooldown for {host} failed: {str(e)}")
+
+    def snapshot(self) -> Dict[str, Dict]:
+        return {
+            host: {"limit": round(limiter.limit, 2), "active": limiter.active, "throttled": limiter.throttled}
+            for host, limiter in list(self._limiters.items())
+        }
@@ -0,0 +1,74 @@
+"""Background dependency probing, so health endpoints never call upstreams themselves."""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DependencyProber:
+    """
+    Runs each registered check on its own interval in a background task and
+    caches the latest result. Health endpoints read `statuses` instead of
+    probing, so probe traffic does not grow with how often they are polled.
+    """
+
+    def __init__(self, timeout: float = 10.0) -> None:
+        self.timeout = timeout
+        self.statuses: Dict[str, Dict] = {}
+        self._checks: Dict[str, Callable[[], Awaitable[bool]]] = {}
+        self._intervals: Dict[str, float] = {}
+        self._tasks = []
+
+    def register(self, name: str, check: Callable[[], Awaitable[bool]], interval: float) -> None:
+        self._checks[name] = check
+        self._intervals[name] = interval
+
+    async def probe(self, name: str) -> bool:
+        """Runs one check now and caches its result. A check that raises or times out counts as down."""
+        start = time.perf_counter()
+        try:
+            healthy = bool(await asyncio.wait_for(self._checks[name](), self.timeout))
+        except Exception as e:
+            logger.warning(f"Health probe for {name} failed: {str(e)}")
+            healthy = False
+        self.statuses[name] = {
+            "healthy": healthy,
+            "checked_at": time.time(),
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+        return healthy
+
+    async def refresh_all(self) -> None:
+        await asyncio.gather(*(self.probe(name) for name in self._checks))
+
+    def is_healthy(self, name: str) -> bool:
+        """
+        Whether the last probe of `name` succeeded. A dependency that has not
+        been probed yet, or whose result is older than three intervals, is not.
+        """
+        status: Optional[Dict] = self.statuses.get(name)
+        if status is None:
+            return False
+        if time.time() - status["checked_at"] > 3 * self._intervals[name]:
+            return False
+        return status["healthy"]
+
+    @property
+    def dependencies(self):
+        return list(self._checks)
+
+    async def _run(self, name: str) -> None:
+        while True:
+            await self.probe(name)
+            await asyncio.sleep(self._intervals[name])
+
+    def start(self) -> None:
+        self._tasks = [asyncio.ensure_future(self._run(name)) for name in self._checks]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
@@ -0,0 +1,37 @@
+"""JSON encoding for response bodies, using the fastest encoder that is installed."""
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover - depends on the environment
+    ujson = None
+
+# Name of the encoder in use
+if orjson is not None:
+    ENCODER = "orjson"
+elif ujson is not None:
+    ENCODER = "ujson"
+else:
+    ENCODER = "json"
+
+
+def dumps(data) -> bytes:
+    """Encodes `data` as compact UTF-8 JSON. Values the encoder does not know are rendered with `str`."""
+    if orjson is not None:
+        return orjson.dumps(data, default=str)
+    if ujson is not None:
+        return ujson.dumps(data, ensure_ascii=False, escape_forward_slashes=False, default=str).encode()
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str).encode()
+
+
+def loads(body):
+    if orjson is not None:
+        return orjson.loads(body)
+    if ujson is not None:
+        return ujson.loads(body)
+    return json.loads(body)
@@ -0,0 +1,164 @@
+"""The `requests.Session` behind the shared upstream session. Imported on first use, as requests is slow to import."""
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from aggregator.metrics import UPSTREAM_ERRORS, UPSTREAM_RETRIES
+from aggregator.timing import observe_phase
+from aggregator.upstream import (BACKOFF, CONNECT_TIMEOUT, MAX_BACKOFF, MAX_RETRIES, POOL_CONNECTIONS, POOL_MAXSIZE,
+                                 READ_TIMEOUT, DeadlineExceeded, Throttled, classify, governor, remaining)
+
+# Still `requests.Timeout`s, so scrapers handle them as before, but callers
+# can tell them apart from a slow host
+class UpstreamDeadlineExceeded(DeadlineExceeded, requests.Timeout):
+    pass
+
+
+class UpstreamThrottled(Throttled, requests.Timeout):
+    pass
+
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+# Statuses with which a host tells us to slow down
+THROTTLED_STATUSES = {429, 502, 503, 504}
+
+
+class UpstreamSession(requests.Session):
+    """
+    A `requests.Session` that applies a default timeout, so no upstream call
+    can hang forever, and records the latency and errors of every request.
+    Inside `upstream.deadline()` each request is also capped to the time left,
+    and none is sent once it has passed, so a lookup its caller stopped
+    waiting for frees its thread soon after.
+
+    Every request is paced by the per-host `upstream.governor`. Idempotent
+    requests the host throttles (429, 502-504) or that fail to connect are
+    retried after Retry-After or a jittered exponential backoff, as long as
+    the wait fits in the deadline. A 429 pauses the host for every caller.
+    """
+
+    def __init__(self, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)) -> None:
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        upstream, phase = classify(method, url)
+        host = urlsplit(url).netloc
+        retryable = method.upper() in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            left = remaining()
+            if left is not None and left <= 0:
+                UPSTREAM_ERRORS.inc(upstream=upstream, status="DeadlineExceeded")
+                raise UpstreamDeadlineExceeded(f"Deadline passed before {method} {url}")
+            if not governor.acquire(host, timeout=left):
+                UPSTREAM_ERRORS.inc(upstream=upstream, status="RateLimited")
+                raise UpstreamThrottled(f"{host} rate limit would not let {method} {url} through before the deadline")
+
+            timeout = _capped(kwargs["timeout"], remaining())
+            throttled = False
+            error = None
+            try:
+                response = self._send(method, url, upstream, phase, timeout, kwargs)
+                throttled = response.status_code in THROTTLED_STATUSES
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            finally:
+                # Every admitted request gives its slot back, whatever it raised
+                governor.release(host, throttled=throttled)
+
+            if error is not None:
+                if isinstance(error, requests.Timeout) and timeout != kwargs["timeout"]:
+                    # Cut short by the deadline rather than by the host's own timeout
+                    raise UpstreamDeadlineExceeded(f"{method} {url} did not finish before the deadline") from error
+                if not retryable or attempt >= MAX_RETRIES or not _wait(_backoff(attempt)):
+                    raise error
+                UPSTREAM_RETRIES.inc(upstream=upstream, reason="connection")
+                attempt += 1
+                continue
+
+            if not throttled:
+                return response
+            retry_after = _retry_after(response)
+            if response.status_code == 429:
+                governor.cool_down(host, retry_after if retry_after is not None else _backoff(attempt))
+            if not retryable or attempt >= MAX_RETRIES:
+                return response
+            delay = max(retry_after or 0, _backoff(attempt))
+            if not _wait(delay):
+                return response
+            UPSTREAM_RETRIES.inc(upstream=upstream, reason=response.status_code)
+            response.close()
+            attempt += 1
+
+    def _send(self, method, url, upstream: str, phase: str, timeout, kwargs):
+        start = time.perf_counter()
+        try:
+            response = super().request(method, url, **{**kwargs, "timeout": timeout})
+        except requests.RequestException as e:
+            UPSTREAM_ERRORS.inc(upstream=upstream, status=type(e).__name__)
+            raise
+        finally:
+            observe_phase(upstream, phase, time.perf_counter() - start)
+        if response.status_code >= 400:
+            UPSTREAM_ERRORS.inc(upstream=upstream, status=response.status_code)
+        return response
+
+
+def _backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff, so throttled callers do not come back in lockstep."""
+    return random.uniform(0, min(MAX_BACKOFF, BACKOFF * 2 ** attempt))
+
+
+def _retry_after(response) -> Optional[float]:
+    """Seconds asked for by a Retry-After header, given as seconds or as an HTTP date."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def _wait(seconds: float) -> bool:
+    """Sleeps before a retry, unless that would run past the deadline."""
+    left = remaining()
+    if seconds > MAX_BACKOFF or (left is not None and seconds >= left):
+        return False
+    time.sleep(seconds)
+    return True
+
+
+def _capped(timeout, left: Optional[float]):
+    if left is None:
+        return timeout
+    if timeout is None:
+        return left
+    if isinstance(timeout, tuple):
+        return tuple(left if part is None else min(part, left) for part in timeout)
+    return min(timeout, left)
+
+
+def create_session() -> requests.Session:
+    """
+    Builds a session whose connections are kept alive and reused across requests.
+    `pool_block` makes callers wait for a free connection instead of opening
+    more than POOL_MAXSIZE connections to the same host.
+    """
+    session = UpstreamSession()
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, pool_block=True)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
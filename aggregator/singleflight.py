@@ -0,0 +1,50 @@
+"""Coalesces concurrent calls for the same key into one in-flight computation."""
+import asyncio
+from typing import Awaitable, Callable, Dict, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    The first caller for a key starts the computation, every caller that
+    arrives while it is still running awaits that same task and receives its
+    result or exception. `coalesced` counts the callers that piggybacked.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task, _ = self.start(key, fn)
+        # Shielded so one caller disconnecting does not cancel the work for everyone else
+        return await asyncio.shield(task)
+
+    def start(self, key: str, fn: Callable[[], Awaitable[T]]) -> Tuple["asyncio.Future[T]", bool]:
+        """
+        Registers the call without waiting for it. Returns the task for `key`
+        and whether this caller started it, which is decided before anyone
+        else can join. Await the task through `asyncio.shield`, as `do` does.
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return task, False
+        task = asyncio.ensure_future(fn())
+        self._calls[key] = task
+        task.add_done_callback(lambda done: self._forget(key, done))
+        return task, True
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every caller went away
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._calls
@@ -0,0 +1,87 @@
+"""Lightweight per-request span recording, reported through the Server-Timing header."""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from aggregator.metrics import PHASE_SECONDS
+
+# Short Server-Timing names for the upstream phases classified by the pooled session
+SPAN_NAMES = {
+    ("letterboxd", "film_page"): "lb-page",
+    ("letterboxd", "search"): "lb-search",
+    ("letterboxd", "stats"): "lb-stats",
+    ("letterboxd", "histogram"): "lb-histogram",
+    ("rotten_tomatoes", "search"): "rt-search",
+    ("rotten_tomatoes", "url_probe"): "rt-probe",
+    ("rotten_tomatoes", "page_fetch"): "rt-fetch",
+    ("rotten_tomatoes", "parse"): "rt-parse",
+    ("imdb", "omdb"): "omdb",
+}
+
+
+class SpanRecorder:
+    """Accumulates how long each named phase of one request took."""
+    __slots__ = ("started", "durations")
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        # Phases that run more than once (e.g. URL probes) are summed
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def header(self) -> str:
+        """The Server-Timing header value, in milliseconds, ending with the total so far."""
+        spans = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.durations.items()]
+        spans.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(spans)
+
+
+_recorder: ContextVar[Optional[SpanRecorder]] = ContextVar("span_recorder", default=None)
+
+
+def start_recording() -> SpanRecorder:
+    """
+    Starts a recorder for the current request. Context variables are copied
+    into tasks and `asyncio.to_thread` workers, so phases timed there land in it too.
+    """
+    recorder = SpanRecorder()
+    _recorder.set(recorder)
+    return recorder
+
+
+def record(name: str, seconds: float) -> None:
+    recorder = _recorder.get()
+    if recorder is not None:
+        recorder.add(name, seconds)
+
+
+@contextmanager
+def span(name: str):
+    """Times the `with` block into the current request's recorder, if there is one."""
+    recorder = _recorder.get()
+    if recorder is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.add(name, time.perf_counter() - start)
+
+
+def observe_phase(upstream: str, phase: str, seconds: float) -> None:
+    """Records an upstream phase both in the latency histogram and as a span."""
+    PHASE_SECONDS.observe(seconds, upstream=upstream, phase=phase)
+    record(SPAN_NAMES.get((upstream, phase), f"{upstream}-{phase}"), seconds)
+
+
+@contextmanager
+def phase(upstream: str, phase: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_phase(upstream, phase, time.perf_counter() - start)
@@ -0,0 +1,125 @@
+"""Pooled HTTP session shared by every upstream adapter (Letterboxd, Rotten Tomatoes, OMDB)."""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
+
+from aggregator.governor import RateGovernor
+
+# Number of hosts to keep a connection pool for, and how many keep-alive
+# connections each of those hosts may hold at once.
+POOL_CONNECTIONS = int(os.getenv("UPSTREAM_POOL_CONNECTIONS", 10))
+POOL_MAXSIZE = int(os.getenv("UPSTREAM_POOL_MAXSIZE", 20))
+# Default (connect, read) timeout for any request that does not set its own
+CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT_SECONDS", 3.05))
+READ_TIMEOUT = float(os.getenv("UPSTREAM_READ_TIMEOUT_SECONDS", 10))
+# Requests to each host are paced to UPSTREAM_RATE_PER_SECOND (bursting to
+# UPSTREAM_BURST) with at most UPSTREAM_MAX_CONCURRENCY in flight. The
+# concurrency limit shrinks while a host throttles us and grows back after.
+# These limits are for the whole deployment: only cooldowns are shared between
+# processes, so each of the WEB_CONCURRENCY workers enforces an equal share.
+RATE_PER_SECOND = float(os.getenv("UPSTREAM_RATE_PER_SECOND", 5))
+BURST = float(os.getenv("UPSTREAM_BURST", 10))
+MAX_CONCURRENCY = int(os.getenv("UPSTREAM_MAX_CONCURRENCY", POOL_MAXSIZE))
+# Throttled (429, 502-504) and failed idempotent requests are retried up to
+# UPSTREAM_MAX_RETRIES times, waiting Retry-After or a jittered exponential
+# backoff starting at UPSTREAM_BACKOFF_SECONDS, within the lookup's deadline.
+MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", 2))
+BACKOFF = float(os.getenv("UPSTREAM_BACKOFF_SECONDS", 0.5))
+MAX_BACKOFF = float(os.getenv("UPSTREAM_MAX_BACKOFF_SECONDS", 30))
+WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", 1)))
+
+governor = RateGovernor(RATE_PER_SECOND / WORKERS, max(1.0, BURST / WORKERS), max(1, MAX_CONCURRENCY // WORKERS))
+
+_session = None
+_lock = threading.Lock()
+
+# time.monotonic() by which the current lookup must finish. Context variables
+# follow the lookup into its worker thread, so the session can see it.
+_deadline: ContextVar[Optional[float]] = ContextVar("upstream_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised by the session for a request that could not finish before the current deadline."""
+
+
+class Throttled(Exception):
+    """Raised by the session for a request the rate governor could not admit before the current deadline."""
+
+
+@contextmanager
+def deadline(seconds: float):
+    """Caps every upstream request made inside the block, and in threads it starts, to `seconds` from now."""
+    token = _deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None outside of one."""
+    until = _deadline.get()
+    return None if until is None else until - time.monotonic()
+
+
+def classify(method: str, url: str) -> Tuple[str, str]:
+    """Names the upstream and the lookup phase an outgoing request belongs to."""
+    parts = urlsplit(url)
+    host, path = parts.netloc, parts.path
+    if host.endswith("omdbapi.com"):
+        return "imdb", "omdb"
+    if host.endswith("rottentomatoes.com"):
+        if path.startswith("/search"):
+            return "rotten_tomatoes", "search"
+        if path.startswith("/m/"):
+            return "rotten_tomatoes", "url_probe" if method.upper() == "HEAD" else "page_fetch"
+        return "rotten_tomatoes", "other"
+    if host.endswith("letterboxd.com"):
+        if path.startswith("/csi/film/") and path.rstrip("/").endswith("/stats"):
+            return "letterboxd", "stats"
+        if path.startswith("/csi/film/") and path.rstrip("/").endswith("/rating-histogram"):
+            return "letterboxd", "histogram"
+        if path.startswith("/search/"):
+            return "letterboxd", "search"
+        if path.startswith("/film/"):
+            return "letterboxd", "film_page"
+        return "letterboxd", "other"
+    return host, "other"
+
+
+def create_session():
+    """Builds the pooled session. See `aggregator.session`, which is only imported from here."""
+    from aggregator import session
+    return session.create_session()
+
+
+def open_session():
+    """Creates the shared session. Called from the app lifespan on startup."""
+    return get_session()
+
+
+def get_session():
+    """Returns the shared session, creating it if the lifespan has not run (e.g. in tests)."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def is_open() -> bool:
+    return _session is not None
+
+
+def close_session() -> None:
+    """Closes every pooled connection. Called from the app lifespan on shutdown."""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,131 @@
+"""Background cache warm-up for the titles most requests ask for."""
+import asyncio
+import fcntl
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CacheWarmer:
+    """
+    Periodically loads a list of titles and calls `warm(title)` for each one
+    that `is_fresh(title)` says will not stay cached until the next run. At
+    most `concurrency` titles are warmed at a time and at most `rate` are
+    started per second, so warming never crowds out live traffic. Runs right
+    away on `start()` and then every `interval` seconds, which should be
+    shorter than the cache TTL so entries are refreshed before they expire.
+
+    Workers sharing a cache pass the same `lock_path`: whichever takes the
+    lock first warms the cache for all of them and the others skip the run.
+    """
+
+    def __init__(self, load_titles: Callable[[], Awaitable[List[str]]], is_fresh: Callable[[str], Awaitable[bool]],
+                 warm: Callable[[str], Awaitable[None]], interval: float, concurrency: int = 4, rate: float = 1.0,
+                 lock_path: Optional[str] = None) -> None:
+        self.load_titles = load_titles
+        self.is_fresh = is_fresh
+        self.warm = warm
+        self.interval = interval
+        self.concurrency = concurrency
+        self.rate = rate
+        self.lock_path = lock_path
+        self.totals = {"warmed": 0, "fresh": 0, "failed": 0}
+        self.status: Dict = {"state": "idle", "runs": 0}
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> Dict:
+        """Warms every title once and returns a summary of the run."""
+        lock = self._lock()
+        if lock is False:
+            self.status["state"] = "warmed by another worker"
+            return dict(self.status)
+        try:
+            return await self._warm_all()
+        finally:
+            if lock is not None:
+                os.close(lock)
+
+    def _lock(self):
+        """The held lock file, None without a `lock_path`, or False when another process holds it."""
+        if self.lock_path is None:
+            return None
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        return fd
+
+    async def _warm_all(self) -> Dict:
+        start = time.perf_counter()
+        titles = list(dict.fromkeys(await self.load_titles()))
+        counts = {"warmed": 0, "fresh": 0, "failed": 0}
+        self.status.update(state="running", started_at=time.time(), total=len(titles), done=0, **counts)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        report_every = max(1, len(titles) // 10)
+
+        def finished(outcome: str) -> None:
+            counts[outcome] += 1
+            self.totals[outcome] += 1
+            done = sum(counts.values())
+            self.status.update(done=done, **counts)
+            if done % report_every == 0 or done == len(titles):
+                elapsed = time.perf_counter() - start
+                logger.info(f"Cache warm-up: {done}/{len(titles)} titles ({counts['warmed']} warmed, "
+                            f"{counts['fresh']} already fresh, {counts['failed']} failed), "
+                            f"{counts['warmed'] / elapsed:.2f} warmed/s")
+
+        async def warm_one(title: str) -> None:
+            async with semaphore:
+                try:
+                    await self.warm(title)
+                except Exception as e:
+                    logger.warning(f"Warming the cache for '{title}' failed: {str(e)}")
+                    finished("failed")
+                else:
+                    finished("warmed")
+
+        tasks = []
+        try:
+            for title in titles:
+                if await self.is_fresh(title):
+                    finished("fresh")
+                    continue
+                tasks.append(asyncio.ensure_future(warm_one(title)))
+                # Paces the lookups, so a long list does not burst at the upstreams
+                await asyncio.sleep(1 / self.rate)
+            await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            for task in tasks:
+                task.cancel()
+            self.status["state"] = "stopped"
+            raise
+
+        elapsed = time.perf_counter() - start
+        self.status.update(state="idle", runs=self.status["runs"] + 1, finished_at=time.time(),
+                           seconds=round(elapsed, 1),
+                           warmed_per_second=round(counts["warmed"] / elapsed, 2) if elapsed else 0.0)
+        return dict(self.status)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                self.status["state"] = "idle"
+                logger.warning(f"Cache warm-up run failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
@@ -0,0 +1,94 @@
+"""
+Rotten Tomatoes extraction benchmark.
+
+Times reading the scores, title and critics consensus out of each saved RT
+movie page, once with the fast scan (`scrapers.RottenTomato.scan`) and once
+with the full BeautifulSoup parse it falls back to, and checks both give the
+same answer. Live RT pages run to 500KB+, most of it below the scoreboard, so
+each fixture is padded to --page-kb by repeating its review cards. Exits
+non-zero when the median speedup on any page is below --min-speedup.
+
+    python benchmarks/rt_extraction.py --runs 20 --page-kb 500 --min-speedup 10
+"""
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "tests", "fixtures", "rotten_tomatoes")
+sys.path.insert(0, ROOT)
+
+from scrapers.RottenTomato import scan, standalone  # noqa: E402
+
+
+def pad(content: str, size: int) -> str:
+    """`content` grown to about `size` characters by repeating its review section before </main>."""
+    start = content.find('<section class="reviews"')
+    end = content.find("</section>", start) + len("</section>")
+    if start == -1 or len(content) >= size:
+        return content
+    reviews = content[start:end]
+    copies = (size - len(content)) // len(reviews) + 1
+    return content.replace("</main>", reviews * copies + "</main>", 1)
+
+
+def fast(content: str):
+    return scan.score_details(content), scan.title(content), scan.critics_consensus(content)
+
+
+def full(content: str):
+    soup = standalone._soup(content)
+    return (standalone._parse_score_details(soup),
+            soup.find("h1", {"id": "media-hero-label"}).find("sr-text").text.strip(),
+            soup.find("div", {"id": "critics-consensus"}).text)
+
+
+def _clean(consensus: str) -> str:
+    return consensus.replace("Critics Consensus", "").replace("\nRead Critics Reviews", "").strip()
+
+
+def measure(fn, content: str, runs: int):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(content)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--page-kb", type=int, default=500)
+    parser.add_argument("--min-speedup", type=float, default=float(os.getenv("RT_EXTRACTION_MIN_SPEEDUP", 10)))
+    args = parser.parse_args(argv)
+
+    failures = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "*.html"))):
+        name = os.path.basename(path)
+        with open(path, encoding="utf-8") as f:
+            content = pad(f.read(), args.page_kb * 1024)
+
+        scanned, parsed = fast(content), full(content)
+        if scanned[:2] != parsed[:2] or _clean(scanned[2]) != _clean(parsed[2]):
+            failures.append(f"{name}: the scan and the full parse disagree")
+            continue
+
+        scan_seconds = statistics.median(measure(fast, content, args.runs))
+        parse_seconds = statistics.median(measure(full, content, args.runs))
+        speedup = parse_seconds / scan_seconds
+        print(f"{name:>20} ({len(content) // 1024} KB): scan {scan_seconds * 1000:7.2f} ms  "
+              f"parse {parse_seconds * 1000:8.2f} ms  speedup {speedup:6.1f}x")
+        if speedup < args.min_speedup:
+            failures.append(f"{name}: the scan is only {speedup:.1f}x faster, below {args.min_speedup}x")
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Cold-start benchmark for the aggregator process.
+
+Measures, each in a fresh interpreter, how long `import main` takes and how
+long `python main.py` takes to answer its first request (GET /livez), and
+checks that importing the app does not pull in any dependency that is meant
+to be imported on first use. Exits non-zero when a median goes over its
+budget or a deferred dependency is imported eagerly, so it can gate CI.
+
+    python benchmarks/startup.py --runs 5 --import-budget 1.0 --first-response-budget 3.0
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only imported when a lookup, probe or error report actually needs them
+DEFERRED_MODULES = ("bs4", "lxml", "numpy", "tqdm", "requests", "urllib3", "httpx", "sentry_sdk")
+
+IMPORT_SNIPPET = """
+import sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(",".join(sorted(m for m in {deferred!r} if m in sys.modules)))
+"""
+
+
+def _env(**extra):
+    env = dict(os.environ, PYTHONPATH=ROOT, **extra)
+    env.pop("SENTRY_DSN", None)
+    return env
+
+
+def measure_import():
+    """Seconds taken by `import main` in a fresh interpreter, and the deferred modules it imported."""
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET.format(deferred=DEFERRED_MODULES)],
+        cwd=ROOT, env=_env(), capture_output=True, text=True, check=True,
+    ).stdout.splitlines()
+    return float(output[0]), [name for name in output[1].split(",") if name]
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_first_response(timeout=30.0):
+    """Seconds from spawning `python main.py` until GET /livez answers 200."""
+    port = _free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "main.py"], cwd=ROOT, env=_env(PORT=str(port)),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"main.py exited with status {process.returncode} before answering")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/livez", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f"main.py did not answer within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget", type=float,
+                        default=float(os.getenv("STARTUP_IMPORT_BUDGET_SECONDS", 1.0)))
+    parser.add_argument("--first-response-budget", type=float,
+                        default=float(os.getenv("STARTUP_FIRST_RESPONSE_BUDGET_SECONDS", 3.0)))
+    args = parser.parse_args(argv)
+
+    imports, eager = [], set()
+    for _ in range(args.runs):
+        seconds, modules = measure_import()
+        imports.append(seconds)
+        eager.update(modules)
+    first_responses = [measure_first_response() for _ in range(args.runs)]
+
+    failures = []
+    for label, samples, budget in (("import main", imports, args.import_budget),
+                                   ("first response", first_responses, args.first_response_budget)):
+        median = statistics.median(samples)
+        print(f"{label:>15}: median {median * 1000:7.1f} ms  min {min(samples) * 1000:7.1f} ms  "
+              f"max {max(samples) * 1000:7.1f} ms  budget {budget * 1000:7.1f} ms")
+        if median > budget:
+            failures.append(f"{label} took {median:.3f}s, over its {budget:.3f}s budget")
+    if eager:
+        failures.append(f"importing main eagerly imported: {', '.join(sorted(eager))}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+"""
+Production server settings: `gunicorn -c gunicorn.conf.py aggregator.api:app`.
+
+The app is imported once in the master and forked into WEB_CONCURRENCY
+uvicorn workers. Workers share the score cache and upstream cooldowns through
+SQLite. Everything else (upstream session, health probes, metrics) is per
+worker. That includes the upstream rate governor, so each worker paces itself
+to its share of the configured upstream limits.
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', 8000)}"
+# The workers are async and mostly wait on upstreams, so one per core keeps every core busy
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+# Read by the app, which is preloaded after this file, to split the upstream rate limits between workers
+os.environ["WEB_CONCURRENCY"] = str(workers)
+worker_class = "uvicorn.workers.UvicornWorker"
+# Import the app before forking, so workers start fast and share its pages
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 60))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+accesslog = "-"
+
+
+def post_fork(server, worker):
+    # Every worker serves its own /metrics, so label its series with its pid
+    from aggregator import metrics
+    metrics.label_worker()
@@ -2,6 +2,8 @@ from aggregator.api import app
 import uvicorn
 import os
 
+# Single-process development server. Production runs several workers with
+# `gunicorn -c gunicorn.conf.py aggregator.api:app`.
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
     uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
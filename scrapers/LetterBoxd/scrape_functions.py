@@ -1,13 +1,9 @@
-from bs4 import BeautifulSoup
-from tqdm import tqdm
-import requests
-import numpy as np
 import re
 import time
 
 _domain = 'https://letterboxd.com/'
 
-def scrape_film(film_title, output_file_extension, quiet=False, concat=False):
+def scrape_film(film_title, output_file_extension, quiet=False, concat=False, session=None):
     """
     Scrapes all available information regarding a film. 
     The function makes multiple request calls to relevant Letterboxd film URLs and gets their raw HTML code.
@@ -16,40 +12,50 @@ def scrape_film(film_title, output_file_extension, quiet=False, concat=False):
     Parameters:
         film_url (str):    The URL link of the film to be scraped.
         output_file_extension (str):    Type of file extension, specifies 'not_found' entry.
-        quiet (bool):                   Option to turn-off tqdm.
+        quiet (bool):                   Option to turn-off progress output.
         concat (bool):                  Checks if concat is enabled.
+        session (requests.Session):     Optional session whose pooled connections are reused.
     Returns:
         film_dict (dict):   A dictionary containing all the film's information.
     """
+    # Imported here so that importing this module stays cheap for the API process
+    import requests
+    from bs4 import BeautifulSoup
+
     film_title = film_title.replace(" ", "-").lower()
     film_url = f"{_domain}film/{film_title}/"
     
+    if session is None:
+        session = requests
+
     film_dict = {}
-    not_found = np.nan if output_file_extension == ".csv" else None
+    not_found = float("nan") if output_file_extension == ".csv" else None
 
     # Obtaining release year, director and average rating of the movie
     try:
-        filmget = requests.get(film_url)
+        filmget = session.get(film_url)
         filmget.raise_for_status()  # Raise an exception for bad status codes
     except requests.exceptions.RequestException as e:
-        if filmget.status_code == 404:
-            # Try to search for the film to get the correct URL
-            search_url = f"{_domain}search/films/{film_title}/"
-            try:
-                search_response = requests.get(search_url)
-                search_soup = BeautifulSoup(search_response.content, 'html.parser')
-                # Find the first film result
-                first_result = search_soup.find('div', class_='film-detail')
-                if first_result:
-                    film_url = _domain + first_result.find('a')['href'].lstrip('/')
-                    filmget = requests.get(film_url)
-                    filmget.raise_for_status()
-                else:
-                    print(f"Film not found: {film_title}")
-                    return None
-            except requests.exceptions.RequestException as e:
-                print(f"Error searching for film: {str(e)}")
+        # Only a missing page is worth a search, anything else is the site failing
+        if e.response is None or e.response.status_code != 404:
+            raise
+        # Try to search for the film to get the correct URL
+        search_url = f"{_domain}search/films/{film_title}/"
+        try:
+            search_response = session.get(search_url)
+            search_soup = BeautifulSoup(search_response.content, 'html.parser')
+            # Find the first film result
+            first_result = search_soup.find('div', class_='film-detail')
+            if first_result:
+                film_url = _domain + first_result.find('a')['href'].lstrip('/')
+                filmget = session.get(film_url)
+                filmget.raise_for_status()
+            else:
+                print(f"Film not found: {film_title}")
                 return None
+        except requests.exceptions.HTTPError as e:
+            print(f"Error searching for film: {str(e)}")
+            return None
     film_soup = BeautifulSoup(filmget.content, 'html.parser')
 
     # Finding the film name
@@ -152,7 +158,7 @@ def scrape_film(film_title, output_file_extension, quiet=False, concat=False):
 
     # Getting number of watches, appearances in lists and number of likes (requires new link) ## 
     movie = film_url.split('/')[-2]                                        # Movie title in URL
-    r = requests.get(f'https://letterboxd.com/csi/film/{film_title}/stats/')    # Stats page of said movie
+    r = session.get(f'https://letterboxd.com/csi/film/{film_title}/stats/')    # Stats page of said movie
     stats_soup = BeautifulSoup(r.content, 'lxml')
 
     # Get number of people that have watched the movie
@@ -171,7 +177,7 @@ def scrape_film(film_title, output_file_extension, quiet=False, concat=False):
     film_dict["Likes"] = int(''.join(likes))
 
     # Getting info on rating histogram (requires new link)
-    r = requests.get(f'https://letterboxd.com/csi/film/{movie}/rating-histogram/')    # Rating histogram page of said movie
+    r = session.get(f'https://letterboxd.com/csi/film/{movie}/rating-histogram/')    # Rating histogram page of said movie
     hist_soup = BeautifulSoup(r.content, 'lxml')
 
     # Get number of fans. Amount is given in 'K' notation, so if relevant rounded off to full thousands
@@ -220,6 +226,46 @@ def scrape_film(film_title, output_file_extension, quiet=False, concat=False):
     
     return film_dict
 
+def scrape_list_titles(list_url, max_pages=None, session=None):
+    """
+    Collects the titles of the films on a Letterboxd list, page by page, without scraping the films themselves.
+
+    Parameters:
+        list_url (str):                 The URL of the list, e.g. https://letterboxd.com/<user>/list/<name>/.
+        max_pages (int):                Optional number of pages after which to stop.
+        session (requests.Session):     Optional session whose pooled connections are reused.
+    Returns:
+        titles (list):  The film titles in list order.
+    """
+    import requests
+    from bs4 import BeautifulSoup
+
+    if session is None:
+        session = requests
+
+    list_url = list_url.rstrip("/") + "/"
+    titles = []
+    page = 1
+    while max_pages is None or page <= max_pages:
+        response = session.get(list_url if page == 1 else f"{list_url}page/{page}/")
+        if response.status_code == 404:
+            break
+        response.raise_for_status()
+        posters = BeautifulSoup(response.content, 'lxml').find_all('div', class_='film-poster')
+        if not posters:
+            break
+        for poster in posters:
+            # The poster image's alt text is the display title, the slug is the fallback
+            image = poster.find('img')
+            title = image.get('alt') if image is not None else None
+            if not title and poster.get('data-film-slug'):
+                title = poster['data-film-slug'].replace("-", " ")
+            if title:
+                titles.append(title)
+        page += 1
+
+    return titles
+
 # Some utility functions are stored here
 
 def stars2val(stars, not_found):
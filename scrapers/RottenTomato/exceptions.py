@@ -2,4 +2,7 @@ class LookupError(Exception):
     pass
 
 class URLCopyError(Exception):
-    pass
\ No newline at end of file
+    pass
+
+class ScrapeError(Exception):
+    """Rotten Tomatoes answered with an error or with a page that could not be read."""
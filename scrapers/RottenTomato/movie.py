@@ -1,31 +1,69 @@
 """Contains classes that auto fetch all attributes."""
 from . import standalone
-import logging
+
+
+class _extracted:
+    """A `Movie` attribute read from its page on first access and kept in the slot of the same name plus `_`."""
+    def __init__(self, extract) -> None:
+        self.extract = extract
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.slot = f"_{name}"
+
+    def __get__(self, movie, owner=None):
+        if movie is None:
+            return self
+        try:
+            return getattr(movie, self.slot)
+        except AttributeError:
+            value = self.extract(movie.query, content=movie.page)
+            setattr(movie, self.slot, value)
+            return value
+
+
 class Movie:
     """
-    Accepts the name of a movie and automatically fetches all attributes.
+    Accepts the name of a movie and fetches its page. Every attribute is
+    extracted from the page the first time it is read and remembered, so
+    callers only pay for the attributes they use.
     Raises `exceptions.LookupError` if the movie is not found on Rotten Tomatoes.
+    Pass a `requests.Session` as `session` to reuse its pooled connections, or
+    already fetched page `content` (raw or a `standalone.Page`) to skip the request entirely.
     """
-    def __init__(self, movie_title: str = "", force_url: str = "") -> None:
-        if not movie_title and not force_url:
+    __slots__ = (
+        "query", "page",
+        "_movie_title", "_synopsis", "_tomatometer", "_audience_score", "_weighted_score", "_rating",
+        "_critics_consensus", "_num_of_reviews", "_duration", "_year_released", "_directors", "_genres", "_actors",
+    )
+
+    movie_title = _extracted(standalone.movie_title)
+    synopsis = _extracted(standalone.synopsis)
+    tomatometer = _extracted(standalone.tomatometer)
+    audience_score = _extracted(standalone.audience_score)
+    weighted_score = _extracted(standalone.weighted_score)
+    rating = _extracted(standalone.rating)
+    critics_consensus = _extracted(standalone.critics_consensus)
+    num_of_reviews = _extracted(standalone.num_of_reviews)
+    duration = _extracted(standalone.duration)
+    year_released = _extracted(standalone.year_released)
+    directors = _extracted(standalone.directors)
+    genres = _extracted(standalone.genres)
+    actors = _extracted(standalone.actors)
+
+    def __init__(self, movie_title: str = "", force_url: str = "", session=None, content: str = None) -> None:
+        if not movie_title and not force_url and content is None:
             raise ValueError("You must provide either a movie_title or force_url.")
 
-        if force_url:
-            content = standalone._request(movie_name="", force_url=force_url)
+        if content is not None:
+            pass
+        elif force_url:
+            content = standalone._request(movie_name="", force_url=force_url, session=session)
         else:
-            content = standalone._request(movie_name=movie_title)
-
-        logging.info(f"Content: {content}")
-        
+            content = standalone._request(movie_name=movie_title, session=session)
 
-        self.movie_title = standalone.movie_title(movie_title, content=content)
-        self.synopsis = standalone.synopsis(movie_title, content=content)
-        self.tomatometer = standalone.tomatometer(self.movie_title, content=content)
-        self.audience_score = standalone.audience_score(self.movie_title, content=content)
-        self.weighted_score = standalone.weighted_score(self.movie_title, content=content)
-        self.rating = standalone.rating(self.movie_title, content=content)
-        self.critics_consensus = standalone.critics_consensus(self.movie_title, content=content)
-        self.num_of_reviews = standalone.num_of_reviews(self.movie_title, content=content)
+        self.query = movie_title
+        # Parsed on first use and shared by every attribute
+        self.page = standalone._as_page(content)
 
     def __str__(self) -> str:
         return f"{self.movie_title.title()}, {self.rating}, {self.duration}.\n" \
@@ -35,7 +73,7 @@ class Movie:
             f"Tomatometer: {self.tomatometer}\n" \
             f"Number of Critic Reviews: {self.num_of_reviews}\n" \
             f"Weighted score: {self.weighted_score}\n" \
-            f"Audience Score: {self.audience_score}\nGenres - {self.genres}\n" \
+            f"Audience Score: {self.audience_score}\nGenres - {', '.join(self.genres)}\n" \
             f"Prominent actors: {', '.join(self.actors)}."
 
     def __eq__(self, other: "Movie") -> bool:
@@ -0,0 +1,93 @@
+"""Fast extraction of the few elements a lookup needs, without parsing the page.
+
+Each function scans the raw page text for its target elements with a
+precompiled pattern and returns None when it cannot find them. Callers then
+fall back to a full parse, so markup these patterns do not expect only costs
+speed and never correctness.
+"""
+import html
+import re
+from typing import Dict, Optional, Union
+
+# Scoreboard values: (tag, slot) -> key in the score details
+SCORE_SLOTS = {
+    ("rt-button", "criticsScore"): "tomatometerScore",
+    ("rt-button", "audienceScore"): "audienceScore",
+    ("rt-text", "ratingsCode"): "rating",
+    ("rt-text", "releaseDate"): "releaseDate",
+    ("rt-text", "duration"): "duration",
+    ("rt-link", "criticsReviews"): "num_of_reviews_tomatometer",
+    ("rt-text", "content"): "synopsis",
+}
+
+# One pass over the page finds every scoreboard element. `slot` must be a whole
+# attribute name, so data-slot="..." does not match.
+_SLOT_ELEMENT = re.compile(
+    r'<(rt-button|rt-text|rt-link)\s[^>]*?(?<![\w-])slot="('
+    + "|".join(sorted({slot for _, slot in SCORE_SLOTS}))
+    + r')"[^>]*>(.*?)</\1\s*>',
+    re.DOTALL,
+)
+_TITLE = re.compile(
+    r'<h1\s[^>]*?(?<![\w-])id="media-hero-label"[^>]*>(.*?)</h1\s*>', re.DOTALL
+)
+_SR_TEXT = re.compile(r"<sr-text\b[^>]*>(.*?)</sr-text\s*>", re.DOTALL)
+_CONSENSUS = re.compile(r'<div\s[^>]*?(?<![\w-])id="critics-consensus"[^>]*>(.*?)</div\s*>', re.DOTALL)
+_COMMENT = re.compile(r"<!--.*?-->", re.DOTALL)
+_TAG = re.compile(r"<[^>]*>")
+
+
+def _text(fragment: str) -> str:
+    """The text of an HTML fragment, as BeautifulSoup's `.text` would read it."""
+    return html.unescape(_TAG.sub("", _COMMENT.sub("", fragment)))
+
+
+def score_details(content: str) -> Optional[Dict[str, Union[str, int]]]:
+    """
+    The scoreboard details, in the shape `standalone._get_score_details`
+    returns. None unless every slot the full parse reads was found and read,
+    as a slot the scan misses may still be there in markup it does not expect.
+    """
+    found: Dict[str, str] = {}
+    for match in _SLOT_ELEMENT.finditer(content):
+        key = SCORE_SLOTS.get((match.group(1), match.group(2)))
+        # The first element in the document wins, as with `soup.find`
+        if key is not None and key not in found:
+            found[key] = _text(match.group(3))
+            if len(found) == len(SCORE_SLOTS):
+                break
+    if len(found) < len(SCORE_SLOTS):
+        return None
+
+    try:
+        details = {
+            "tomatometerScore": int(found["tomatometerScore"].strip("%\n")),
+            "audienceScore": int(found["audienceScore"].strip("%\n")),
+            "rating": found["rating"],
+            "releaseDate": found["releaseDate"].strip("Released "),
+            "duration": found["duration"],
+            "num_of_reviews_tomatometer": int(found["num_of_reviews_tomatometer"].strip().split(" ")[0]),
+            "synopsis": found["synopsis"].strip(),
+        }
+    except ValueError:
+        return None
+    return details
+
+
+def title(content: str) -> Optional[str]:
+    """The movie title shown in the page heading, or None when the heading was not found."""
+    heading = _TITLE.search(content)
+    if heading is None:
+        return None
+    sr_text = _SR_TEXT.search(heading.group(1))
+    if sr_text is None:
+        return None
+    return _text(sr_text.group(1)).strip()
+
+
+def critics_consensus(content: str) -> Optional[str]:
+    """The raw text of the critics consensus block, or None when it was not found or holds nested blocks."""
+    block = _CONSENSUS.search(content)
+    if block is None or "<div" in block.group(1):
+        return None
+    return _text(block.group(1))
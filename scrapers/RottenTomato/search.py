@@ -1,11 +1,15 @@
 """Search for movies. Use search page results to find absolute link. Write more/better docs later."""
-import requests
-
 import re
-from typing import List
+from typing import Callable, List, Optional
 
 from . import utils
-from .exceptions import LookupError
+from .exceptions import LookupError, ScrapeError
+
+# One search result. Rows span several lines.
+_ROW_START = "<search-page-media-row"
+_SEARCH_ROW = re.compile(_ROW_START + r"(.*?)</search-page-media-row>", re.DOTALL)
+# Shown instead of any rows when nothing matched the search
+_NO_RESULTS = re.compile(r"no results found", re.IGNORECASE)
 
 
 class SearchListing:
@@ -20,7 +24,7 @@ class SearchListing:
         """
         Takes a snippet from the search page's HTML code.
         
-        Use `re.findall(r"<search-page-media-row(.*?)</search-page-media-row>", content)`
+        Use `re.findall(r"<search-page-media-row(.*?)</search-page-media-row>", content, re.DOTALL)`
         to separate the html into snippets, then feed each one to this method to create
         a `SearchListing` objects.
         """
@@ -45,22 +49,60 @@ class SearchListing:
         return f"Tomatometer: {self.has_tomatometer}. URL: {self.url}. Is movie: {self.is_movie}."
 
 
-def _movie_search_content(name: str) -> str:
-    """Raw HTML content from searching for a movie."""
+class _FirstMovie:
+    """
+    A `utils.fetch_text` stop condition that reads search rows as they arrive
+    and is met at the first movie with a tomatometer, kept as `listing`. Only
+    the text of a row still arriving is held, so each row is scanned once.
+    """
+    def __init__(self) -> None:
+        self.pending = ""
+        self.rows = 0
+        self.listing: Optional[SearchListing] = None
+
+    def __call__(self, piece: str) -> bool:
+        self.pending += piece
+        end = 0
+        for match in _SEARCH_ROW.finditer(self.pending):
+            self.rows += 1
+            end = match.end()
+            listing = SearchListing.from_html(match.group(1))
+            if listing.is_movie and listing.has_tomatometer:
+                self.listing = listing
+                return True
+        # Keep an unfinished row, or what could be the start of the next one
+        start = self.pending.find(_ROW_START, end)
+        if start == -1:
+            start = max(end, len(self.pending) - len(_ROW_START) + 1)
+        self.pending = self.pending[start:]
+        return False
+
+
+def _movie_search_content(name: str, session=None, done: Callable[[str], bool] = None) -> str:
+    """
+    Raw HTML content from searching for a movie. Pass a `requests.Session` to
+    reuse its connections, and `done` to stop reading the page early (see
+    `utils.fetch_text`).
+    Raises `ScrapeError` if the search page could not be fetched.
+    """
+    if session is None:
+        import requests
+        session = requests
     url_name = "%20".join(name.split())
     url = f"https://www.rottentomatoes.com/search?search={url_name}"
-    content = str(requests.get(url, headers=utils.REQUEST_HEADERS).content)
-    
-    # Remove misc quotes from conversion
-    content = content[2:-1]
+    status_code, content = utils.fetch_text(session, url, done=done)
+    if status_code != 200:
+        raise ScrapeError(f"Rotten Tomatoes search answered {status_code}: {url}")
     return content
 
 
-def search_results(name: str) -> List[SearchListing]:
+def _parse_results(content: str) -> List[SearchListing]:
+    return [SearchListing.from_html(snippet) for snippet in _SEARCH_ROW.findall(content)]
+
+
+def search_results(name: str, session=None) -> List[SearchListing]:
     """Get a list of search results."""
-    content = _movie_search_content(name)
-    snippets = re.findall(r"<search-page-media-row(.*?)</search-page-media-row>", content)
-    return [SearchListing.from_html(snippet) for snippet in snippets]
+    return _parse_results(_movie_search_content(name, session=session))
 
 
 def filter_searches(results: List[SearchListing]) -> List[SearchListing]:
@@ -68,12 +110,18 @@ def filter_searches(results: List[SearchListing]) -> List[SearchListing]:
     return list(filter(lambda result: result.is_movie and result.has_tomatometer, results))
 
 
-def top_movie_result(name: str) -> SearchListing:
-    """Get the first movie result that has a tomatometer."""
-    results = search_results(name)
-    filtered = filter_searches(results)
-    
-    if not filtered:
-        raise LookupError("No movies found.")
-        
-    return filtered[0]
+def top_movie_result(name: str, session=None) -> SearchListing:
+    """
+    Get the first movie result that has a tomatometer. The results come near
+    the top of the search page, so it is only read until one turns up.
+    Raises `LookupError` when nothing matched, and `ScrapeError` when the page
+    held no results but did not say nothing matched either, as happens when
+    its markup changes.
+    """
+    first = _FirstMovie()
+    content = _movie_search_content(name, session=session, done=first)
+    if first.listing is not None:
+        return first.listing
+    if not first.rows and not _NO_RESULTS.search(content):
+        raise ScrapeError(f"No search results could be read for {name!r}")
+    raise LookupError("No movies found.")
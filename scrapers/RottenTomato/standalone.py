@@ -1,23 +1,97 @@
 """Standalone functions to fetch attributes about a movie."""
-from bs4 import BeautifulSoup
-
 # Non-local imports
+import contextvars
 import json
-import requests  # interact with RT website
-from typing import List, Dict, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Union
 
 # Project modules
 from .exceptions import *
+from . import scan
 from . import search
 from . import utils
 
 
-def _movie_url(movie_name: str) -> str:
+# `_movie_url` probes its candidate urls on this pool, remembers which url a
+# name resolved to for a day and which candidates did not exist for an hour.
+_probe_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="rt-url-probe")
+_resolved_urls = utils.TTLCache(ttl=24 * 60 * 60)
+_missing_urls = utils.TTLCache(ttl=60 * 60)
+
+# Closes the element holding every scoreboard slot, which comes after the title and schema.org data
+SCOREBOARD_END = "</media-scorecard>"
+
+
+def _soup(content):
+    """Parses a page. bs4 is only imported on first use, keeping this module cheap to import."""
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(content, 'html.parser')
+
+
+class Page:
+    """A fetched movie page that is parsed at most once.
+
+    Every extractor in this module accepts a `Page` as `content`, so any
+    number of attributes can be read from one fetch for the cost of a
+    single tree build. The scoreboard and schema.org data are also only
+    extracted once, and the scoreboard, title and critics consensus are
+    scanned for directly, so the tree is only built when that fails.
+    """
+    def __init__(self, content: str) -> None:
+        self.content = content
+        self._tree = None
+        self._score_details = None
+        self._schema = None
+
+    @property
+    def soup(self):
+        """The parsed document, built on first use."""
+        if self._tree is None:
+            self._tree = _soup(self.content)
+        return self._tree
+
+    @property
+    def score_details(self) -> Dict[str, Union[str, int, None]]:
+        if self._score_details is None:
+            self._score_details = scan.score_details(self.content) or _parse_score_details(self.soup)
+        return self._score_details
+
+    @property
+    def schema(self) -> Dict:
+        if self._schema is None:
+            self._schema = json.loads(
+                _extract(
+                    self.content,
+                    '<script type="application/ld+json">',
+                    '</script>'
+                )
+            )
+        return self._schema
+
+
+def _as_page(content: Union[str, Page]) -> Page:
+    return content if isinstance(content, Page) else Page(content)
+
+
+def _page(movie_name: str, content: Union[str, Page, None]) -> Page:
+    """The parsed page for `content`, fetching the movie's page first if none was given."""
+    if content is None:
+        content = _request(movie_name)
+    return _as_page(content)
+
+
+def _movie_url(movie_name: str, session=None) -> str:
     """Generates a target url on the Rotten Tomatoes website given
     the name of a movie.
 
+    The candidate urls are probed concurrently and the first one, in order
+    of preference, that exists wins. Resolved names and candidates that
+    returned 404 are remembered for a while, so repeat lookups probe less
+    or not at all.
+
     Args:
         movie_name (str): Title of the movie. Any number of words.
+        session (requests.Session): Session to send the probes through.
 
     Returns:
         str: `str` url that should point to the movie's real page.
@@ -30,6 +104,10 @@ def _movie_url(movie_name: str) -> str:
     # Handle special characters and spaces
     all_words = movie_name.split()
     underscored = '_'.join(word for word in all_words if word)
+
+    resolved = _resolved_urls.get(underscored)
+    if resolved is not None:
+        return resolved
     
     # Try different URL variations
     urls = [
@@ -46,16 +124,42 @@ def _movie_url(movie_name: str) -> str:
             f'https://www.rottentomatoes.com/m/the_{base_name}_{year}'
         ])
     
+    if session is None:
+        import requests
+        session = requests
+
     # Return the first URL that works
-    for url in urls:
-        response = requests.head(url, headers=utils.REQUEST_HEADERS)
-        if response.status_code == 200:
-            return url
+    found = _first_found([url for url in urls if _missing_urls.get(url) is None], session)
+    if found is not None:
+        _resolved_urls.set(underscored, found)
+        return found
             
     # If no URL works, return the basic version (will be handled by search fallback)
     return urls[0]
 
 
+def _probe(url: str, session) -> int:
+    return session.head(url, headers=utils.REQUEST_HEADERS).status_code
+
+
+def _first_found(urls: List[str], session) -> Optional[str]:
+    """Probes `urls` side by side and returns the first, in list order, that
+    answers 200. Probes that can no longer win are cancelled."""
+    # Each probe gets a copy of the caller's context, so deadlines set by the caller still apply
+    futures = [_probe_pool.submit(contextvars.copy_context().run, _probe, url, session) for url in urls]
+    try:
+        for url, future in zip(urls, futures):
+            status_code = future.result()
+            if status_code == 200:
+                return url
+            if status_code == 404:
+                _missing_urls.set(url, True)
+        return None
+    finally:
+        for future in futures:
+            future.cancel()
+
+
 def _extract(content: str, start_string: str, end_string: str) -> str:
     """Retrieves parts of the RT website data given a start string
     and an end string.
@@ -78,37 +182,34 @@ def _extract(content: str, start_string: str, end_string: str) -> str:
     return content[start_idx + len(start_string):end_idx]
 
 
-def _get_schema_json_ld(content: str) -> Dict:
+def _get_schema_json_ld(content: Union[str, Page]) -> Dict:
     """Retrieves the schema.org data model for a movie. This data
     typically contains Tomatometer score, genre etc.
 
     Args:
-        content (str): The raw RT data for a movie.
+        content (str | Page): The raw or parsed RT data for a movie.
 
     Returns:
         object: The schema.org data model for the movie.
     """
-    return json.loads(
-        _extract(
-            content,
-            '<script type="application/ld+json">',
-            '</script>'
-        )
-    )
+    return _as_page(content).schema
 
 
-def _get_score_details(content: str) -> Dict[str, Union[str, int, None]]:
+def _get_score_details(content: Union[str, Page]) -> Dict[str, Union[str, int, None]]:
     """Retrieves the scoreboard data for a movie. Scoreboard data
     typically contains audience score, ratings, duration etc.
 
     Args:
-       content (str): The raw RT data for a movie.
+       content (str | Page): The raw or parsed RT data for a movie.
 
     Returns:
         object: The scoreboard data for the movie.
     """
-    soup = BeautifulSoup(content, 'html.parser')
+    return _as_page(content).score_details
+
 
+def _parse_score_details(soup) -> Dict[str, Union[str, int, None]]:
+    """Reads the scoreboard slots out of a parsed page."""
     try:
         tomatometer_score = int(soup.find('rt-button', {'slot': 'criticsScore'}).text.strip("%\n"))
     except AttributeError:
@@ -143,7 +244,8 @@ def _get_score_details(content: str) -> Dict[str, Union[str, int, None]]:
             "synopsis": synopsis}
 
 
-def _request(movie_name: str, raw_url: bool = False, force_url: str = "") -> str:
+def _request(movie_name: str, raw_url: bool = False, force_url: str = "", session=None,
+             scores_only: bool = False) -> str:
     """Scrapes Rotten Tomatoes for the raw website data, to be
     passed to each standalone function for parsing.
 
@@ -151,38 +253,53 @@ def _request(movie_name: str, raw_url: bool = False, force_url: str = "") -> str
         movie_name (str): Title of the movie. Case insensitive.
         raw_url (bool): Don't search for the movie, build the url manually.
         force_url (str): Use this url to scrape the site. Don't use this.
+        session (requests.Session): Reuse this session's pooled connections.
+        scores_only (bool): Stop reading the page once the scoreboard has
+            been received. Only the scoreboard, title and schema.org data
+            can then be relied on.
 
     Raises:
         LookupError: If the movie isn't found on Rotten Tomatoes.
         This could be due to a typo in entering the movie's name,
         duplicates, or other issues.
+        ScrapeError: If Rotten Tomatoes answered with any other error,
+        or its search page could not be read.
 
     Returns:
         str: The raw RT website data of the given movie.
     """
+    if session is None:
+        import requests
+        session = requests
+
     if raw_url or force_url:
-        rt_url = _movie_url(movie_name) if movie_name else force_url
+        rt_url = _movie_url(movie_name, session=session) if movie_name else force_url
     else:
-        search_result = search.top_movie_result(movie_name)
+        search_result = search.top_movie_result(movie_name, session=session)
         rt_url = search_result.url
 
-    response = requests.get(rt_url, headers=utils.REQUEST_HEADERS)
+    done = utils.received(SCOREBOARD_END) if scores_only else None
+    status_code, content = utils.fetch_text(session, rt_url, done=done)
 
-    if response.status_code == 404:
+    if status_code == 404:
         raise LookupError(
             "Unable to find that movie on Rotten Tomatoes.",
             f"Try this link to source the movie manually: {rt_url}"
         )
+    if status_code != 200:
+        raise ScrapeError(f"Rotten Tomatoes answered {status_code}: {rt_url}")
 
-    return response.text
+    return content
 
 
-def movie_title(movie_name: str, content: str = None) -> str:
+def movie_title(movie_name: str, content: Union[str, Page] = None) -> str:
     """Search for the movie and return the queried title."""
-    if content is None:
-        content = _request(movie_name)
+    page = _page(movie_name, content)
+    title = scan.title(page.content)
+    if title is not None:
+        return title
 
-    soup = BeautifulSoup(content, 'html.parser')
+    soup = page.soup
     
     # Update selector to use the new HTML structure
     title_element = soup.find('h1', {"id": "media-hero-label"})
@@ -197,32 +314,26 @@ def movie_title(movie_name: str, content: str = None) -> str:
     return sr_text.text.strip()
 
 
-def num_of_reviews(movie_name: str, content: str = None) -> Union[int, None]:
+def num_of_reviews(movie_name: str, content: Union[str, Page] = None) -> Union[int, None]:
     """Search for the movie and return the number of critic
     reviews for the Tomatometer score."""
 
-    if content is None:
-        content = _request(movie_name)
-
-    value = _get_score_details(content)['num_of_reviews_tomatometer']
+    value = _page(movie_name, content).score_details['num_of_reviews_tomatometer']
 
     if not value:
         return None
     return value
 
 
-def synopsis(movie_name: str, content: str = None) -> str:
+def synopsis(movie_name: str, content: Union[str, Page] = None) -> str:
     """ Search for the movie and return the synopsis """
 
-    if content is None:
-        content = _request(movie_name)
-
-    value = _get_score_details(content)['synopsis']
+    value = _page(movie_name, content).score_details['synopsis']
 
     return value
 
 
-def tomatometer(movie_name: str, content: str = None) -> Union[int, None]:
+def tomatometer(movie_name: str, content: Union[str, Page] = None) -> Union[int, None]:
     """Returns an integer of the Rotten Tomatoes tomatometer
     of `movie_name`. 
 
@@ -238,17 +349,14 @@ def tomatometer(movie_name: str, content: str = None) -> Union[int, None]:
         int: Tomatometer of `movie_name`.
         None: If the movie doesn't have a tomatometer.
     """
-    if content is None:
-        content = _request(movie_name)
-
-    value = _get_score_details(content)['tomatometerScore']
+    value = _page(movie_name, content).score_details['tomatometerScore']
 
     if not value:
         return None
     return value
 
 
-def audience_score(movie_name: str, content: str = None) -> Union[int, None]:
+def audience_score(movie_name: str, content: Union[str, Page] = None) -> Union[int, None]:
     """Returns an integer of the Rotten Tomatoes tomatometer
     of `movie_name`. 
 
@@ -264,17 +372,14 @@ def audience_score(movie_name: str, content: str = None) -> Union[int, None]:
         int: Tomatometer of `movie_name`.
         None: If the movie doesn't have an audience score.
     """
-    if content is None:
-        content = _request(movie_name)
-
-    value = _get_score_details(content)['audienceScore']
+    value = _page(movie_name, content).score_details['audienceScore']
 
     if not value:
         return None
     return value
 
 
-def genres(movie_name: str, content: str = None) -> List[str]:
+def genres(movie_name: str, content: Union[str, Page] = None) -> List[str]:
     """Returns an integer of the Rotten Tomatoes tomatometer
     of `movie_name`. Copies the movie url to clipboard.
 
@@ -289,22 +394,17 @@ def genres(movie_name: str, content: str = None) -> List[str]:
     Returns:
         list[str]: List of genres.
     """
-    if content is None:
-        content = _request(movie_name)
+    return _page(movie_name, content).schema['genre']
 
-    return _get_schema_json_ld(content)['genre']
 
-
-def weighted_score(movie_name: str, content: str = None) -> Union[int, None]:
+def weighted_score(movie_name: str, content: Union[str, Page] = None) -> Union[int, None]:
     """
     2/3 tomatometer, 1/3 audience score. Returns None if both scores are None.
     If one score is None, the other is returned.
     """
-    if content is None:
-        content = _request(movie_name)
-
-    t_score = tomatometer(movie_name, content)
-    a_score = audience_score(movie_name, content)
+    page = _page(movie_name, content)
+    t_score = tomatometer(movie_name, page)
+    a_score = audience_score(movie_name, page)
 
     if t_score is None and a_score is None:
         return None
@@ -318,42 +418,31 @@ def weighted_score(movie_name: str, content: str = None) -> Union[int, None]:
     return int((2 / 3) * t_score + ((1 / 3) * a_score))
 
 
-def rating(movie_name: str, content: str = None) -> str:
+def rating(movie_name: str, content: Union[str, Page] = None) -> str:
     """Returns a `str` of PG, PG-13, R, etc."""
-    if content is None:
-        content = _request(movie_name)
+    return _page(movie_name, content).score_details['rating']
 
-    return _get_score_details(content)['rating']
 
-
-def duration(movie_name: str, content: str = None) -> str:
+def duration(movie_name: str, content: Union[str, Page] = None) -> str:
     """Returns the duration, ex. 1h 32m."""
-    if content is None:
-        content = _request(movie_name)
-
-    return _get_score_details(content)['duration']
+    return _page(movie_name, content).score_details['duration']
 
 
-def year_released(movie_name: str, content: str = None) -> str:
+def year_released(movie_name: str, content: Union[str, Page] = None) -> str:
     """Returns a string of the year the movie was released."""
-    if content is None:
-        content = _request(movie_name)
-
-    release_year = _get_score_details(
-        content)['releaseDate'].split(',')[1].strip()
+    release_year = _page(movie_name, content).score_details['releaseDate'].split(',')[1].strip()
 
     return release_year
 
 
-def actors(movie_name: str, max_actors: int = 5, content: str = None) -> List[str]:
+def actors(movie_name: str, max_actors: int = 5, content: Union[str, Page] = None) -> List[str]:
     """
     Returns a list of the top 5 actors listed by Rotten Tomatoes.
     """
-    if content is None:
-        content = _request(movie_name)
+    page = _page(movie_name, content)
 
-    def _get_top_n_actors(html, n):
-        soup = BeautifulSoup(html, 'html.parser')
+    def _get_top_n_actors(page, n):
+        soup = page.soup
         cast_items = soup.find_all('a', {'data-qa': 'person-item'})
 
         top_actors = []
@@ -369,41 +458,31 @@ def actors(movie_name: str, max_actors: int = 5, content: str = None) -> List[st
             i += 1
         return top_actors
 
-    return _get_top_n_actors(content, max_actors)
+    return _get_top_n_actors(page, max_actors)
 
 
-def directors(movie_name: str, max_directors: int = 10, content: str = None) -> List[str]:
+def directors(movie_name: str, max_directors: int = 10, content: Union[str, Page] = None) -> List[str]:
     """Returns a list of all the directors listed
     by Rotten Tomatoes. Specify `max_directors` to only receive
     a certain number."""
     get_name = lambda x: x.split("/")[-1].replace("_", " ").title()
-    if content is None:
-        content = _request(movie_name)
-
-    directors = _get_schema_json_ld(content)["director"][:max_directors]
+    directors = _page(movie_name, content).schema["director"][:max_directors]
 
     return [get_name(n["sameAs"]).replace("-", " ") for n in directors]
 
 
-def image(movie_name: str, content: str = None) -> str:
-    if content is None:
-        content = _request(movie_name)
-
-    return _get_schema_json_ld(content)['image']
-
-
-def url(movie_name: str, content: str = None) -> str:
-    if content is None:
-        content = _request(movie_name)
+def image(movie_name: str, content: Union[str, Page] = None) -> str:
+    return _page(movie_name, content).schema['image']
 
-    return _get_schema_json_ld(content)['url']
 
+def url(movie_name: str, content: Union[str, Page] = None) -> str:
+    return _page(movie_name, content).schema['url']
 
-def critics_consensus(movie_name: str, content: str = None) -> str:
-    if content is None:
-        content = _request(movie_name)
 
-    soup = BeautifulSoup(content, 'html.parser')
+def critics_consensus(movie_name: str, content: Union[str, Page] = None) -> str:
+    page = _page(movie_name, content)
+    consensus = scan.critics_consensus(page.content)
+    if consensus is None:
+        consensus = page.soup.find('div', {'id': 'critics-consensus'}).text
 
-    return soup.find('div', {'id': 'critics-consensus'}).text.replace("Critics Consensus", "").replace(
-        "\nRead Critics Reviews", "").strip()
+    return consensus.replace("Critics Consensus", "").replace("\nRead Critics Reviews", "").strip()
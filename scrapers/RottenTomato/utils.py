@@ -1,5 +1,9 @@
 """Various utilities."""
-from typing import Dict
+import codecs
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
 
 
 REQUEST_HEADERS: Dict[str, str] = {
@@ -12,3 +16,83 @@ REQUEST_HEADERS: Dict[str, str] = {
     "Accept": "text/html",
     "Referer": "https://www.google.com"
 }
+
+
+def fetch_text(session, url: str, done: Callable[[str], bool] = None,
+               chunk_size: int = 16 * 1024) -> Tuple[int, str]:
+    """GETs `url` and returns the status code and the decoded body.
+
+    With `done`, a successful body is streamed instead. `done` is called
+    with each newly decoded piece of it, in order, and the connection is
+    closed as soon as it returns true. Only the body read up to then is
+    returned. That saves downloading and decoding the rest when the caller
+    only needs what is near the top. Closing early means the connection is
+    not reused.
+    """
+    response = session.get(url, headers=REQUEST_HEADERS, stream=done is not None)
+    if done is None or response.status_code != 200:
+        return response.status_code, response.text
+
+    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+    pieces = []
+    try:
+        for chunk in response.iter_content(chunk_size):
+            piece = decoder.decode(chunk)
+            pieces.append(piece)
+            if done(piece):
+                break
+        else:
+            pieces.append(decoder.decode(b"", final=True))
+        return response.status_code, "".join(pieces)
+    finally:
+        response.close()
+
+
+def received(marker: str) -> Callable[[str], bool]:
+    """A `fetch_text` stop condition that is met once `marker` has been read, even if it spans two pieces."""
+    tail = ""
+
+    def done(piece: str) -> bool:
+        nonlocal tail
+        window = tail + piece
+        if marker in window:
+            return True
+        tail = window[max(0, len(window) - len(marker) + 1):]
+        return False
+
+    return done
+
+
+class TTLCache:
+    """A small thread-safe mapping whose entries expire `ttl` seconds after
+    being set. Once it holds `max_entries`, the oldest entries make room."""
+    def __init__(self, ttl: float, max_entries: int = 4096) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return default
+            value, expires = item
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return default
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# Keep the tests' cache database out of the shared temp directory, where it
+# would be the same file a locally running server uses
+os.environ.setdefault("CACHE_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="aggregator-tests-"), "cache.sqlite3"))
@@ -0,0 +1,39 @@
+from unittest.mock import patch
+
+from aggregator.breaker import CircuitBreaker
+
+
+def test_opens_on_failure_rate():
+    breaker = CircuitBreaker("rt", window=10, min_calls=4, failure_rate=0.5)
+    breaker.record_success(0.1)
+    breaker.record_success(0.1)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+def test_slow_calls_count_as_failures():
+    breaker = CircuitBreaker("rt", min_calls=2, failure_rate=1.0, slow_call_seconds=1.0)
+    breaker.record_success(2.0)
+    breaker.record_success(3.0)
+    assert breaker.state == CircuitBreaker.OPEN
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker("rt", min_calls=1, reset_timeout=30)
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    with patch("aggregator.breaker.time.monotonic", return_value=breaker.opened_at + 31):
+        assert breaker.allow()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert not breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with patch("aggregator.breaker.time.monotonic", return_value=breaker.opened_at + 31):
+        assert breaker.allow()
+        breaker.record_success(0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+    assert breaker.snapshot()["times_opened"] == 2
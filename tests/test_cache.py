@@ -0,0 +1,116 @@
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+from aggregator.cache import ScoreCache, normalize_title
+
+
+def test_keys_are_normalized():
+    cache = ScoreCache()
+    cache.set("The  Godfather", {"title": "The Godfather"})
+    assert normalize_title(" THE godfather ") == "the godfather"
+    assert cache.get("the godfather") == {"title": "The Godfather"}
+    assert cache.get("THE GODFATHER") == {"title": "The Godfather"}
+    assert cache.stats()["hits"] == 2
+
+def test_expired_entries_are_removed():
+    cache = ScoreCache(ttl=timedelta(seconds=10))
+    cache.set("alien", {"title": "Alien"})
+    with patch("aggregator.cache.time.time", return_value=time.time() + 11):
+        assert cache.get("alien") is None
+    assert len(cache) == 0
+    assert cache.size_bytes == 0
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ScoreCache(max_entries=2)
+    cache.set("alien", {"title": "Alien"})
+    cache.set("aliens", {"title": "Aliens"})
+    cache.get("alien")
+    cache.set("alien 3", {"title": "Alien 3"})
+    assert "alien" in cache
+    assert "aliens" not in cache
+    assert cache.stats()["evictions"] == 1
+
+def test_byte_budget_is_enforced():
+    payload = {"poster": "x" * 100}
+    cache = ScoreCache(max_bytes=300)
+    for title in ("a", "b", "c", "d"):
+        cache.set(title, payload)
+    assert cache.size_bytes <= 300
+    assert len(cache) == 2
+    cache.set("huge", {"poster": "x" * 1000})
+    assert "huge" not in cache
+
+def test_stale_entries_are_served_within_grace():
+    cache = ScoreCache(ttl=timedelta(seconds=10), stale_grace=timedelta(seconds=5))
+    cache.set("alien", {"title": "Alien"})
+    with patch("aggregator.cache.time.time", return_value=time.time() + 12):
+        entry = cache.lookup("alien")
+        assert entry.data == {"title": "Alien"}
+        assert cache.is_stale(entry)
+        assert cache.get("alien") is None
+    with patch("aggregator.cache.time.time", return_value=time.time() + 16):
+        assert cache.lookup("alien") is None
+    assert cache.stats()["stale_hits"] == 2
+
+def test_sqlite_backend_is_shared_and_persistent(tmp_path):
+    from aggregator.cache import SQLiteBackend
+
+    path = str(tmp_path / "scores.sqlite3")
+    writer = ScoreCache(backend=SQLiteBackend(path))
+    writer.set("Alien", {"title": "Alien"})
+
+    # A second cache on the same file stands in for another worker or a restarted process
+    reader = ScoreCache(backend=SQLiteBackend(path))
+    assert "alien" not in reader
+    assert reader.get("ALIEN") == {"title": "Alien"}
+    assert reader.stats()["backend_hits"] == 1
+    # Promoted into the in-memory layer, so the next read skips SQLite
+    assert "alien" in reader
+    reader.get("alien")
+    assert reader.stats()["backend_hits"] == 1
+
+def test_backend_without_memory_layer(tmp_path):
+    from aggregator.cache import SQLiteBackend
+
+    cache = ScoreCache(ttl=timedelta(seconds=10), backend=SQLiteBackend(str(tmp_path / "scores.sqlite3")), use_l1=False)
+    cache.set("alien", {"title": "Alien"})
+    assert len(cache) == 0
+    assert cache.get("alien") == {"title": "Alien"}
+    with patch("aggregator.cache.time.time", return_value=time.time() + 11):
+        assert cache.get("alien") is None
+
+def test_entries_keep_encoded_body(tmp_path):
+    from aggregator import serialization
+    from aggregator.cache import SQLiteBackend
+
+    data = {"title": "Amélie", "poster": "https://example.com/a.jpg", "year": None}
+    cache = ScoreCache(backend=SQLiteBackend(str(tmp_path / "cache.sqlite3")))
+    cache.set("amelie", data)
+    entry = cache.lookup("amelie")
+    assert serialization.loads(entry.body) == data
+    assert entry.size == len("amelie") + len(entry.body)
+
+    # Loaded from the backend, the stored body is served as it was encoded
+    stored = cache.backend.load("amelie")
+    assert stored.body == entry.body
+    assert stored.data == data
+
+def test_backend_failures_degrade_to_memory():
+    import sqlite3
+    from aggregator.cache import CacheBackend
+
+    class LockedBackend(CacheBackend):
+        def load(self, key):
+            raise sqlite3.OperationalError("database is locked")
+
+        def store(self, key, entry):
+            raise sqlite3.OperationalError("database is locked")
+
+    cache = ScoreCache(backend=LockedBackend())
+    cache.set("alien", {"title": "Alien"})
+    cache.set("heat", {"title": "Heat"}, wait=False)
+    assert cache.lookup("alien").data == {"title": "Alien"}
+    assert cache.lookup("ran") is None
@@ -0,0 +1,112 @@
+import time
+
+from aggregator.governor import HostLimiter, RateGovernor, SQLiteCooldowns
+
+
+def test_token_bucket_paces_requests_after_burst():
+    limiter = HostLimiter(rate=20, burst=2, max_concurrency=10)
+    start = time.monotonic()
+    for _ in range(4):
+        assert limiter.acquire(timeout=1)
+        limiter.release()
+    # Two requests ride the burst, the other two wait 1/20s each
+    assert time.monotonic() - start >= 0.09
+
+def test_acquire_gives_up_when_it_cannot_get_through_in_time():
+    limiter = HostLimiter(rate=1, burst=1, max_concurrency=1)
+    assert limiter.acquire(timeout=0)
+    assert not limiter.acquire(timeout=0.05)  # no free slot
+    limiter.release()
+    assert not limiter.acquire(timeout=0.05)  # no token for another second
+
+def test_concurrency_limit_halves_when_throttled_and_grows_back():
+    limiter = HostLimiter(rate=1000, burst=1000, max_concurrency=8)
+    for _ in range(2):
+        assert limiter.acquire(timeout=0)
+        limiter.release(throttled=True)
+    assert limiter.limit == 2
+    assert limiter.throttled == 2
+
+    for _ in range(10):
+        assert limiter.acquire(timeout=0)
+        limiter.release()
+    assert 2 < limiter.limit <= 8
+
+def test_cooldown_is_shared_between_governors(tmp_path):
+    path = str(tmp_path / "cooldowns.sqlite3")
+    first = RateGovernor(rate=100, burst=100, max_concurrency=4, shared=SQLiteCooldowns(path))
+    second = RateGovernor(rate=100, burst=100, max_concurrency=4, shared=SQLiteCooldowns(path))
+
+    first.cool_down("letterboxd.com", 5)
+    assert not second.acquire("letterboxd.com", timeout=0.05)
+    assert second.acquire("www.omdbapi.com", timeout=0.05)
+
+def test_session_retries_after_429_and_pauses_the_host():
+    import io
+    import requests
+    from unittest.mock import patch
+    from aggregator import upstream
+    from aggregator.session import create_session
+
+    throttled = requests.Response()
+    throttled.status_code = 429
+    throttled.headers["Retry-After"] = "0"
+    throttled.raw = io.BytesIO(b"")
+    ok = requests.Response()
+    ok.status_code = 200
+
+    session = create_session()
+    with patch.object(requests.Session, "request", side_effect=[throttled, ok]) as send, \
+            patch.object(upstream, "governor", RateGovernor(100, 100, 4)) as governor, \
+            patch("aggregator.session.governor", governor), \
+            patch("aggregator.session._backoff", return_value=0):
+        with upstream.deadline(2.0):
+            response = session.get("https://letterboxd.com/film/heat/")
+    assert response.status_code == 200
+    assert send.call_count == 2
+    assert governor.snapshot()["letterboxd.com"]["throttled"] == 1
+
+def test_session_does_not_retry_past_the_deadline():
+    import requests
+    from unittest.mock import patch
+    from aggregator import upstream
+    from aggregator.session import create_session
+
+    throttled = requests.Response()
+    throttled.status_code = 503
+    throttled.headers["Retry-After"] = "10"
+
+    session = create_session()
+    with patch.object(requests.Session, "request", return_value=throttled) as send, \
+            patch("aggregator.session.governor", RateGovernor(100, 100, 4)):
+        with upstream.deadline(1.0):
+            response = session.get("https://www.rottentomatoes.com/m/heat")
+    assert response.status_code == 503
+    assert send.call_count == 1
+
+def test_session_gives_the_slot_back_whatever_the_request_raises():
+    import pytest
+    import requests
+    from unittest.mock import patch
+    from aggregator.session import create_session
+
+    session = create_session()
+    governor = RateGovernor(100, 100, 1)
+    with patch.object(requests.Session, "request", side_effect=requests.TooManyRedirects("loop")), \
+            patch("aggregator.session.governor", governor):
+        for _ in range(3):
+            with pytest.raises(requests.TooManyRedirects):
+                session.get("https://letterboxd.com/film/heat/")
+    assert governor.snapshot()["letterboxd.com"]["active"] == 0
+
+def test_session_reports_a_cooldown_past_the_deadline_as_throttled():
+    import pytest
+    from unittest.mock import patch
+    from aggregator import upstream
+    from aggregator.session import create_session
+
+    governor = RateGovernor(100, 100, 4)
+    governor.cool_down("www.omdbapi.com", 60)
+    with patch("aggregator.session.governor", governor), upstream.deadline(1.0):
+        with pytest.raises(upstream.Throttled):
+            create_session().get("http://www.omdbapi.com/")
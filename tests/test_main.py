@@ -21,6 +21,16 @@ def mock_env_variables():
     }):
         yield
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Every test starts with an empty score cache, closed circuit breakers and no probe results"""
+    from aggregator.api import cache, breakers, prober
+    cache.clear()
+    prober.statuses.clear()
+    for breaker in breakers.values():
+        breaker.reset()
+    yield
+
 #Obviously reads the root
 def test_read_root():
     response = client.get("/")
@@ -28,9 +38,18 @@ def test_read_root():
 
 #Obviously reads the health, however I had to make sure it mocks the API check otherwise it would not be
 #a real unit test as the network call could fail or the API could be down
+#/health only reads what the background prober cached, so the probes are run here by hand
+@patch('aggregator.api.check_rotten_tomatoes')
+@patch('aggregator.api.check_letterboxd')
 @patch('aggregator.api.check_imdb_api')
-def test_health(mock_check_imdb):
+def test_health(mock_check_imdb, mock_check_letterboxd, mock_check_rt):
+    import asyncio
+    from aggregator.api import prober
+
     mock_check_imdb.return_value = True  # Mock the API check to return True
+    mock_check_letterboxd.return_value = True
+    mock_check_rt.return_value = True
+    asyncio.run(prober.refresh_all())
     response = client.get("/health")
     assert response.status_code == 200
     data = response.json()
@@ -53,9 +72,17 @@ def test_movie_not_found(mock_requests, mock_scrape):
     response = client.get("/movie/ThisMovieDoesNotExistAtAll123456789")
     assert response.status_code == 404
 
+@patch('aggregator.api.check_rotten_tomatoes')
+@patch('aggregator.api.check_letterboxd')
 @patch('aggregator.api.check_imdb_api')
-def test_health_check_api_down(mock_check_imdb):
+def test_health_check_api_down(mock_check_imdb, mock_check_letterboxd, mock_check_rt):
+    import asyncio
+    from aggregator.api import prober
+
     mock_check_imdb.return_value = False
+    mock_check_letterboxd.return_value = True
+    mock_check_rt.return_value = True
+    asyncio.run(prober.refresh_all())
     response = client.get("/health")
     assert response.status_code == 503
     data = response.json()
@@ -99,4 +126,607 @@ def test_verify_routes():
     assert "/" in routes
     assert "/movie/{title}" in routes
     assert "/health" in routes
+    assert "/livez" in routes
+    assert "/readyz" in routes
+
+
+#The three sources are looked up side by side, so a request should only take about as long as the slowest one
+@patch('aggregator.api.fetch_omdb')
+@patch('aggregator.api.fetch_rotten_tomatoes')
+@patch('aggregator.api.scrape_film')
+def test_sources_fetched_concurrently(mock_scrape, mock_rt, mock_omdb):
+    import time
+
+    def slow(result):
+        def wrapper(*args, **kwargs):
+            time.sleep(0.3)
+            return result
+        return wrapper
+
+    mock_scrape.side_effect = slow({"Average_rating": 4.0})
+    mock_rt.side_effect = slow({"critic_score": 90, "audience_score": 80, "aggregate_score": 86})
+    mock_omdb.side_effect = slow((200, {"Title": "Slow Movie", "imdbRating": "8.0", "Year": "2000", "Poster": "N/A"}))
+
+    start = time.perf_counter()
+    response = client.get("/movie/Slow Movie")
+    elapsed = time.perf_counter() - start
+
+    assert response.status_code == 200
+    assert response.json()["aggregate_score"] == round((80 + 80 + 86) / 3, 2)
+    assert elapsed < 0.75
+
+#The lifespan owns one pooled session and every source adapter is handed that same session
+@patch('aggregator.api.fetch_omdb')
+@patch('aggregator.api.fetch_rotten_tomatoes')
+@patch('aggregator.api.scrape_film')
+def test_lifespan_shares_pooled_session(mock_scrape, mock_rt, mock_omdb):
+    from aggregator import upstream
+
+    mock_scrape.return_value = {"Average_rating": 3.5}
+    mock_rt.return_value = {"critic_score": 0, "audience_score": 0, "aggregate_score": 0}
+    mock_omdb.return_value = (200, {"Title": "Pooled", "imdbRating": "N/A"})
+
+    with TestClient(app) as lifespan_client:
+        session = upstream.get_session()
+        assert lifespan_client.get("/movie/Pooled").status_code == 200
+        assert mock_scrape.call_args.kwargs["session"] is session
+        assert upstream.get_session() is session
+    assert upstream._session is None
+
+#Concurrent requests for the same title (in any casing) should share a single upstream lookup
+@patch('aggregator.api.fetch_omdb')
+@patch('aggregator.api.fetch_rotten_tomatoes')
+@patch('aggregator.api.scrape_film')
+def test_concurrent_requests_are_coalesced(mock_scrape, mock_rt, mock_omdb):
+    import asyncio
+    import time
+    import httpx
+    from aggregator.api import inflight
+
+    def slow_scrape(*args, **kwargs):
+        time.sleep(0.2)
+        return {"Average_rating": 4.0}
+
+    mock_scrape.side_effect = slow_scrape
+    mock_rt.return_value = {"critic_score": 0, "audience_score": 0, "aggregate_score": 0}
+    mock_omdb.return_value = (200, {"Title": "Trending", "imdbRating": "7.0"})
+    coalesced_before = inflight.coalesced
+
+    async def burst():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+            titles = ["Trending", "trending", "TRENDING", "Trending", "trending"]
+            return await asyncio.gather(*(async_client.get(f"/movie/{title}") for title in titles))
+
+    responses = asyncio.run(burst())
+
+    assert all(response.status_code == 200 for response in responses)
+    assert mock_scrape.call_count == 1
+    assert inflight.coalesced - coalesced_before == 4
+    assert len(inflight) == 0
+
+#A stale entry is returned immediately with its age, then refreshed after the response is sent
+@patch('aggregator.api.fetch_omdb')
+@patch('aggregator.api.fetch_rotten_tomatoes')
+@patch('aggregator.api.scrape_film')
+def test_stale_entry_served_and_refreshed(mock_scrape, mock_rt, mock_omdb):
+    import time
+    from aggregator.api import cache, CACHE_DURATION
+
+    mock_scrape.return_value = {"Average_rating": 4.0}
+    mock_rt.return_value = {"critic_score": 0, "audience_score": 0, "aggregate_score": 0}
+    mock_omdb.return_value = (200, {"Title": "Old Favourite", "imdbRating": "9.0"})
+
+    # Store the entry as if it had been cached just over CACHE_DURATION ago
+    with patch('aggregator.cache.time.time', return_value=time.time() - CACHE_DURATION.total_seconds() - 60):
+        cache.set("old favourite", {"title": "Old Favourite", "aggregate_score": 50})
+
+    response = client.get("/movie/Old Favourite")
+    assert response.status_code == 200
+    assert response.headers["X-Cache"] == "STALE"
+    assert int(response.headers["Age"]) >= CACHE_DURATION.total_seconds()
+    assert response.json()["aggregate_score"] == 50
+
+    # The refresh ran as a background task once the stale response went out
+    assert mock_scrape.call_count == 1
+    refreshed = client.get("/movie/Old Favourite")
+    assert refreshed.headers["X-Cache"] == "HIT"
+    assert refreshed.json()["aggregate_score"] == 85
+
+#The batch endpoint dedupes titles, answers cache hits first and streams one JSON object per line
+@patch('aggregator.api.fetch_omdb')
+@patch('aggregator.api.fetch_rotten_tomatoes')
+@patch('aggregator.api.scrape_film')
+def test_batch_streams_ndjson(mock_scrape, mock_rt, mock_omdb):
+    import json
+    from aggregator.api import cache
+
+    def scrape(title, *args, **kwargs):
+        return None if title == "unknown film" else {"Average_rating": 4.0}
+
+    mock_scrape.side_effect = scrape
+    mock_rt.return_value = {"critic_score": 0, "audience_score": 0, "aggregate_score": 0}
+    mock_omdb.return_value = (200, {"Title": "Some Film", "imdbRating": "8.0"})
+    cache.set("cached film", {"title": "Cached Film", "aggregate_score": 70})
+
+    response = client.post("/movies", json={"titles": ["Heat", "heat", "Cached Film", "Unknown Film", "Ran"]})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0] == {"title": "Cached Film", "status": 200, "data": {"title": "Cached Film", "aggregate_score": 70}}
+    results = {line["title"]: line for line in lines}
+    assert set(results) == {"Heat", "Cached Film", "Unknown Film", "Ran"}
+    assert results["Heat"]["data"]["aggregate_score"] == 80
+    assert results["Unknown Film"]["status"] == 404
+    assert mock_scrape.call_count == 3
+
+def test_batch_rejects_empty_list():
+    response = client.post("/movies", json={"titles": []})
+    assert response.status_code == 422
+
+#The streaming endpoint emits one event per source as it answers, then the aggregate
+@patch('aggregator.api.fetch_omdb')
+@patch('aggregator.api.fetch_rotten_tomatoes')
+@patch('aggregator.api.scrape_film')
+def test_stream_emits_source_events(mock_scrape, mock_rt, mock_omdb):
+    import json
+    import time
+
+    def slow_rt(*args, **kwargs):
+        time.sleep(0.2)
+        return {"critic_score": 90, "audience_score": 80, "aggregate_score": 86}
+
+    mock_scrape.return_value = {"Average_rating": 4.0}
+    mock_rt.side_effect = slow_rt
+    mock_omdb.return_value = (200, {"Title": "Streamed", "imdbRating": "8.0", "Year": "2001", "Poster": "N/A"})
+
+    response = client.get("/movie/Streamed/stream")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+
+    names = [name for name, _ in events]
+    assert sorted(names[:3]) == ["imdb", "letterboxd", "rotten_tomatoes"]
+    assert names[2] == "rotten_tomatoes"
+    assert events[3] == ("aggregate", client.get("/movie/Streamed").json())
+    assert events[3][1]["aggregate_score"] == round((80 + 80 + 86) / 3, 2)
+
+#Leadership of a lookup is settled when it is registered, and a lookup that fails early still ends the stream
+def test_single_flight_start_decides_the_leader_up_front():
+    import asyncio
+    from aggregator.singleflight import SingleFlight
+
+    async def run():
+        flights = SingleFlight()
+        first, first_leads = flights.start("heat", lambda: asyncio.sleep(0.01, result=1))
+        second, second_leads = flights.start("heat", lambda: asyncio.sleep(0.01, result=2))
+        assert (first_leads, second_leads) == (True, False)
+        assert first is second
+        assert await asyncio.shield(first) == 1
+        assert "heat" not in flights
+
+    asyncio.run(run())
+
+@patch('aggregator.api.compute_scores')
+def test_stream_ends_when_the_lookup_fails_before_any_source_answers(mock_compute):
+    from fastapi import HTTPException
+
+    async def broken(*args, **kwargs):
+        raise HTTPException(status_code=503, detail="broken")
+
+    mock_compute.side_effect = broken
+    response = client.get("/movie/Broken Stream/stream")
+    assert response.status_code == 200
+    assert response.text.startswith("event: error")
+
+#A source that misses its deadline is left out of the aggregate instead of holding up the response
+@patch('aggregator.api.fetch_omdb')
+@patch('aggregator.api.fetch_rotten_tomatoes')
+@patch('aggregator.api.scrape_film')
+def test_slow_source_times_out(mock_scrape, mock_rt, mock_omdb):
+    import time
+    from aggregator.api import cache, SOURCE_DEADLINES
+
+    def hung_rt(*args, **kwargs):
+        time.sleep(1)
+        return {"critic_score": 90, "audience_score": 80, "aggregate_score": 86}
+
+    mock_scrape.return_value = {"Average_rating": 4.0}
+    mock_rt.side_effect = hung_rt
+    mock_omdb.return_value = (200, {"Title": "Hung", "imdbRating": "6.0"})
+
+    # A long-lived client keeps one event loop, as uvicorn does, so closing the
+    # loop does not wait for the abandoned lookup thread
+    with patch.dict(SOURCE_DEADLINES, {"rotten_tomatoes": 0.2}), TestClient(app) as lifespan_client:
+        start = time.perf_counter()
+        response = lifespan_client.get("/movie/Hung")
+        elapsed = time.perf_counter() - start
+
+    assert response.status_code == 200
+    assert elapsed < 0.9
+    data = response.json()
+    assert data["timed_out"] == ["rotten_tomatoes"]
+    assert data["rotten_tomatoes"]["aggregate_score"] == 0
+    assert data["aggregate_score"] == 70
+    # Partial results are not cached
+    assert cache.get("hung") is None
+
+@patch('aggregator.api.fetch_omdb')
+@patch('aggregator.api.fetch_rotten_tomatoes')
+@patch('aggregator.api.scrape_film')
+def test_all_sources_time_out(mock_scrape, mock_rt, mock_omdb):
+    import time
+    from aggregator.api import SOURCE_DEADLINES
+
+    def hung(*args, **kwargs):
+        time.sleep(0.5)
+
+    mock_scrape.side_effect = mock_rt.side_effect = mock_omdb.side_effect = hung
+    with patch.dict(SOURCE_DEADLINES, {"letterboxd": 0.1, "rotten_tomatoes": 0.1, "imdb": 0.1}):
+        response = client.get("/movie/Nothing Answers")
+    assert response.status_code == 504
+    assert "lookup;dur=" in response.headers["Server-Timing"]
+
+#Once Rotten Tomatoes keeps failing its breaker opens, and later requests skip it without calling it
+@patch('aggregator.api.prober.is_healthy')
+@patch('aggregator.api.fetch_omdb')
+@patch('aggregator.api.fetch_rotten_tomatoes')
+@patch('aggregator.api.scrape_film')
+def test_failing_source_trips_circuit_breaker(mock_scrape, mock_rt, mock_omdb, mock_is_healthy):
+    from aggregator.api import breakers
+
+    mock_scrape.return_value = {"Average_rating": 4.0}
+    mock_rt.side_effect = ValueError("Could not find title")
+    mock_omdb.return_value = (200, {"Title": "Broken", "imdbRating": "6.0"})
+    mock_is_healthy.return_value = True
+
+    for attempt in range(breakers["rotten_tomatoes"].min_calls):
+        assert client.get(f"/movie/Broken {attempt}").status_code == 500
+    assert mock_rt.call_count == breakers["rotten_tomatoes"].min_calls
+
+    response = client.get("/movie/Broken")
+    assert response.status_code == 200
+    assert response.json()["circuit_open"] == ["rotten_tomatoes"]
+    assert response.json()["aggregate_score"] == 70
+    assert mock_rt.call_count == breakers["rotten_tomatoes"].min_calls
+
+    health = client.get("/health").json()
+    assert health["circuit_breakers"]["rotten_tomatoes"]["state"] == "open"
+    assert health["circuit_breakers"]["imdb"]["state"] == "closed"
+
+#Rotten Tomatoes refusing us is a failure of the source, not a movie it does not have
+@patch('aggregator.api.prober.is_healthy')
+@patch('aggregator.api.fetch_omdb')
+@patch('aggregator.api.scrape_film')
+def test_blocked_rotten_tomatoes_trips_circuit_breaker(mock_scrape, mock_omdb, mock_is_healthy):
+    import io
+    import requests
+    from aggregator.api import breakers
 
+    def forbidden(url, headers=None, stream=False):
+        response = requests.Response()
+        response.status_code = 403
+        response.raw = io.BytesIO(b"<html>Access denied</html>")
+        return response
+
+    mock_scrape.return_value = {"Average_rating": 4.0}
+    mock_omdb.return_value = (200, {"Title": "Blocked", "imdbRating": "6.0"})
+    mock_is_healthy.return_value = True
+    session = MagicMock(get=MagicMock(side_effect=forbidden))
+
+    with patch('aggregator.api.upstream.get_session', return_value=session):
+        for attempt in range(breakers["rotten_tomatoes"].min_calls):
+            assert client.get(f"/movie/Blocked {attempt}").status_code == 500
+        response = client.get("/movie/Blocked")
+    assert response.json()["circuit_open"] == ["rotten_tomatoes"]
+    assert breakers["rotten_tomatoes"].snapshot()["state"] == "open"
+
+#A source our own rate governor holds back is left out, without counting against its breaker
+@patch('aggregator.api.fetch_rotten_tomatoes')
+@patch('aggregator.api.scrape_film')
+def test_throttled_source_is_skipped(mock_scrape, mock_rt):
+    from aggregator.api import breakers
+    from aggregator.governor import RateGovernor
+
+    mock_scrape.return_value = {"Average_rating": 4.0}
+    mock_rt.return_value = {"critic_score": 90, "audience_score": 80, "aggregate_score": 86}
+    governor = RateGovernor(100, 100, 4)
+    governor.cool_down("www.omdbapi.com", 60)
+
+    with patch("aggregator.session.governor", governor):
+        response = client.get("/movie/heat")
+    assert response.status_code == 200
+    assert response.json()["throttled"] == ["imdb"]
+    assert breakers["imdb"].snapshot()["recent_calls"] == 0
+
+#Liveness and health never call an upstream themselves
+@patch('aggregator.api.check_rotten_tomatoes')
+@patch('aggregator.api.check_letterboxd')
+@patch('aggregator.api.check_imdb_api')
+def test_probes_are_served_from_cache(mock_check_imdb, mock_check_letterboxd, mock_check_rt):
+    import asyncio
+    from aggregator.api import prober
+
+    mock_check_imdb.return_value = True
+    mock_check_letterboxd.return_value = True
+    mock_check_rt.return_value = False
+    asyncio.run(prober.refresh_all())
+    calls = mock_check_imdb.call_count
+
+    assert client.get("/livez").json() == {"status": "alive"}
+    response = client.get("/health")
+    assert response.status_code == 503
+    assert response.json()["detail"]["dependencies"]["rotten_tomatoes_scraping"] == False
+
+    mock_check_rt.return_value = True
+    asyncio.run(prober.probe("rotten_tomatoes_scraping"))
+    for _ in range(3):
+        assert client.get("/livez").status_code == 200
+        assert client.get("/health").status_code == 200
+    assert mock_check_imdb.call_count == calls
+
+#Readiness follows this process's own state, not the health of the upstream sites
+@patch('aggregator.api.check_rotten_tomatoes')
+@patch('aggregator.api.check_letterboxd')
+@patch('aggregator.api.check_imdb_api')
+def test_readiness_ignores_upstream_health(mock_check_imdb, mock_check_letterboxd, mock_check_rt):
+    from aggregator.api import cache
+
+    mock_check_imdb.return_value = False
+    mock_check_letterboxd.return_value = False
+    mock_check_rt.return_value = False
+
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.json()["detail"]["checks"]["started"] == False
+
+    with TestClient(app) as lifespan_client:
+        response = lifespan_client.get("/readyz")
+        assert response.status_code == 200
+        assert response.json()["checks"] == {"started": True, "upstream_session": True, "cache_backend": True}
+
+        with patch.object(cache.backend, 'ping', side_effect=Exception("disk I/O error")):
+            response = lifespan_client.get("/readyz")
+            assert response.status_code == 503
+            assert response.json()["detail"]["checks"]["cache_backend"] == False
+
+#/metrics exposes per-source latency and cache counters in the Prometheus text format
+@patch('aggregator.api.fetch_omdb')
+@patch('aggregator.api.fetch_rotten_tomatoes')
+@patch('aggregator.api.scrape_film')
+def test_metrics_endpoint(mock_scrape, mock_rt, mock_omdb):
+    mock_scrape.return_value = {"Average_rating": 4.0}
+    mock_rt.return_value = {"critic_score": 0, "audience_score": 0, "aggregate_score": 0}
+    mock_omdb.return_value = (200, {"Title": "Measured", "imdbRating": "7.0"})
+
+    client.get("/movie/Measured")
+    client.get("/movie/Measured")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+    text = response.text
+    assert 'aggregator_source_seconds_count{source="imdb",outcome="ok"}' in text
+    assert 'aggregator_http_requests_total{method="GET",route="/movie/{title}",status="200"}' in text
+    assert "# TYPE aggregator_cache_hits_total counter" in text
+    assert "aggregator_requests_in_flight 1" in text
+
+#Every /movie response breaks its latency down by phase in a Server-Timing header
+@patch('aggregator.api.fetch_omdb')
+@patch('aggregator.api.fetch_rotten_tomatoes')
+@patch('aggregator.api.scrape_film')
+def test_server_timing_header(mock_scrape, mock_rt, mock_omdb):
+    from aggregator import timing
+
+    def timed_omdb(*args, **kwargs):
+        timing.observe_phase("imdb", "omdb", 0.25)
+        return 200, {"Title": "Timed", "imdbRating": "7.0"}
+
+    mock_scrape.return_value = {"Average_rating": 4.0}
+    mock_rt.return_value = {"critic_score": 0, "audience_score": 0, "aggregate_score": 0}
+    mock_omdb.side_effect = timed_omdb
+
+    miss = client.get("/movie/Timed")
+    phases = dict(span.split(";dur=") for span in miss.headers["Server-Timing"].split(", "))
+    assert list(phases) == ["cache", "omdb", "aggregate", "lookup", "total"]
+    assert phases["omdb"] == "250.0"
+
+    hit = client.get("/movie/Timed")
+    assert [span.split(";")[0] for span in hit.headers["Server-Timing"].split(", ")] == ["cache", "total"]
+
+#The profiler endpoint does not exist unless an admin token is configured, and needs that token
+def test_profile_requires_admin_token():
+    with patch('aggregator.api.ADMIN_TOKEN', None):
+        assert client.get("/admin/profile", params={"seconds": 0.01}).status_code == 404
+    with patch('aggregator.api.ADMIN_TOKEN', "secret"):
+        assert client.get("/admin/profile", params={"seconds": 0.01}).status_code == 403
+        assert client.get("/admin/profile", params={"seconds": 0.01},
+                          headers={"X-Admin-Token": "wrong"}).status_code == 403
+        assert client.get("/admin/profile", params={"seconds": 0.01},
+                          headers={"X-Admin-Token": "sécret".encode()}).status_code == 403
+
+@patch('aggregator.api.ADMIN_TOKEN', "secret")
+def test_profile_formats():
+    collapsed = client.get("/admin/profile", params={"seconds": 0.05},
+                           headers={"X-Admin-Token": "secret"})
+    assert collapsed.status_code == 200
+    assert collapsed.headers["content-type"].startswith("text/plain")
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in collapsed.text.splitlines())
+
+    speedscope = client.get("/admin/profile", params={"seconds": 0.05, "format": "speedscope"},
+                            headers={"X-Admin-Token": "secret"})
+    assert speedscope.status_code == 200
+    assert speedscope.json()["$schema"] == "https://www.speedscope.app/file-format-schema.json"
+
+#Cache hits are answered with the body encoded when the entry was stored
+def test_cache_hit_serves_encoded_body():
+    from aggregator.api import cache
+
+    cache.set("encoded film", {"title": "Encoded Film", "aggregate_score": 70})
+    with patch('aggregator.serialization.dumps') as mock_dumps:
+        response = client.get("/movie/Encoded Film")
+    assert response.status_code == 200
+    assert response.headers["X-Cache"] == "HIT"
+    assert response.headers["content-type"] == "application/json"
+    assert response.content == cache.lookup("encoded film").body
+    assert int(response.headers["content-length"]) == len(response.content)
+    assert response.json() == {"title": "Encoded Film", "aggregate_score": 70}
+    mock_dumps.assert_not_called()
+
+#A slow cache backend write does not hold up the response or the event loop
+@patch('aggregator.api.fetch_omdb')
+@patch('aggregator.api.fetch_rotten_tomatoes')
+@patch('aggregator.api.scrape_film')
+def test_backend_write_does_not_block_response(mock_scrape, mock_rt, mock_omdb):
+    import time
+    from aggregator.api import cache
+
+    mock_scrape.return_value = {"Average_rating": 4.0}
+    mock_rt.return_value = {"critic_score": 0, "audience_score": 0, "aggregate_score": 0}
+    mock_omdb.return_value = (200, {"Title": "Slow Write", "imdbRating": "7.0"})
+
+    with patch.object(cache.backend, 'store', side_effect=lambda key, entry: time.sleep(0.5)):
+        start = time.perf_counter()
+        response = client.get("/movie/Slow Write")
+        assert response.status_code == 200
+        assert time.perf_counter() - start < 0.4
+        cache.clear()
+
+#Streams share the single-flight lookup with /movie, and a stale cached stream is refreshed afterwards
+@patch('aggregator.api.fetch_omdb')
+@patch('aggregator.api.fetch_rotten_tomatoes')
+@patch('aggregator.api.scrape_film')
+def test_stream_joins_inflight_lookup_and_refreshes_stale(mock_scrape, mock_rt, mock_omdb):
+    import asyncio
+    import json
+    import time
+    import httpx
+    from aggregator.api import cache, CACHE_DURATION
+
+    def slow_scrape(*args, **kwargs):
+        time.sleep(0.2)
+        return {"Average_rating": 4.0}
+
+    mock_scrape.side_effect = slow_scrape
+    mock_rt.return_value = {"critic_score": 0, "audience_score": 0, "aggregate_score": 0}
+    mock_omdb.return_value = (200, {"Title": "Shared", "imdbRating": "7.0"})
+
+    async def burst():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+            return await asyncio.gather(async_client.get("/movie/Shared"), async_client.get("/movie/Shared/stream"),
+                                        async_client.get("/movie/shared/stream"))
+
+    single, *streams = asyncio.run(burst())
+    assert mock_scrape.call_count == 1
+    for stream in streams:
+        events = [block.split("\n") for block in stream.text.strip().split("\n\n")]
+        assert sorted(event for event, _ in events[:3]) == ["event: imdb", "event: letterboxd", "event: rotten_tomatoes"]
+        assert events[3][0] == "event: aggregate"
+        assert json.loads(events[3][1][len("data: "):]) == single.json()
+
+    with patch('aggregator.cache.time.time', return_value=time.time() - CACHE_DURATION.total_seconds() - 60):
+        cache.set("stale stream", {"title": "Stale Stream", "imdb_score": 0, "letterboxd_score": 0,
+                                   "rotten_tomatoes": {}, "aggregate_score": 10, "year": None, "poster": None})
+    client.get("/movie/Stale Stream/stream")
+    assert mock_scrape.call_count == 2
+    assert not cache.is_stale(cache.lookup("stale stream"))
+
+#Lookups abandoned at their deadline do not starve new titles of worker threads
+@patch('aggregator.api.fetch_omdb')
+@patch('aggregator.api.fetch_rotten_tomatoes')
+@patch('aggregator.api.scrape_film')
+def test_abandoned_lookups_do_not_starve_new_titles(mock_scrape, mock_rt, mock_omdb):
+    import asyncio
+    import time
+    import httpx
+
+    def hanging_rt(*args, **kwargs):
+        time.sleep(1)
+        return {"critic_score": 0, "audience_score": 0, "aggregate_score": 0}
+
+    mock_scrape.return_value = {"Average_rating": 4.0}
+    mock_rt.side_effect = hanging_rt
+    mock_omdb.return_value = (200, {"Title": "Busy", "imdbRating": "7.0"})
+
+    async def burst():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+            return await asyncio.gather(*(async_client.get(f"/movie/Busy {i}") for i in range(8)))
+
+    with patch.dict('aggregator.api.SOURCE_DEADLINES', {"rotten_tomatoes": 0.05}):
+        start = time.perf_counter()
+        responses = asyncio.run(burst())
+        elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.9
+    for response in responses:
+        assert response.status_code == 200
+        assert response.json()["timed_out"] == ["rotten_tomatoes"]
+        assert response.json()["imdb_score"] == 70
+
+#A film without a Letterboxd rating scores 0 there and does not count against the source's breaker
+@patch('aggregator.api.fetch_omdb')
+@patch('aggregator.api.fetch_rotten_tomatoes')
+@patch('aggregator.api.scrape_film')
+def test_unrated_letterboxd_film_is_not_a_failure(mock_scrape, mock_rt, mock_omdb):
+    from aggregator.api import breakers
+
+    mock_scrape.return_value = {"Average_rating": None}
+    mock_rt.return_value = {"critic_score": 90, "audience_score": 0, "aggregate_score": 90}
+    mock_omdb.return_value = (200, {"Title": "Unrated", "imdbRating": "7.0"})
+
+    response = client.get("/movie/Unrated")
+    assert response.status_code == 200
+    assert response.json()["letterboxd_score"] == 0
+    assert response.json()["aggregate_score"] == 80
+    assert breakers["letterboxd"].snapshot()["failure_rate"] == 0
+
+#Responses carry an ETag and a max-age tied to the cache TTL, and a matching If-None-Match gets a 304
+@patch('aggregator.api.fetch_omdb')
+@patch('aggregator.api.fetch_rotten_tomatoes')
+@patch('aggregator.api.scrape_film')
+def test_conditional_get(mock_scrape, mock_rt, mock_omdb):
+    from aggregator.api import CACHE_DURATION
+
+    mock_scrape.return_value = {"Average_rating": 4.0}
+    mock_rt.return_value = {"critic_score": 0, "audience_score": 0, "aggregate_score": 0}
+    mock_omdb.return_value = (200, {"Title": "Conditional", "imdbRating": "7.0"})
+
+    miss = client.get("/movie/Conditional")
+    etag = miss.headers["ETag"]
+    assert etag.startswith('"') and etag.endswith('"')
+    assert miss.headers["Cache-Control"] == f"public, max-age={int(CACHE_DURATION.total_seconds())}"
+
+    hit = client.get("/movie/Conditional")
+    assert hit.headers["ETag"] == etag
+    assert 0 < int(hit.headers["Cache-Control"].split("max-age=")[1]) <= CACHE_DURATION.total_seconds()
+
+    for if_none_match in (etag, f'"other", W/{etag}', "*"):
+        not_modified = client.get("/movie/Conditional", headers={"If-None-Match": if_none_match})
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+        assert not_modified.headers["ETag"] == etag
+    assert client.get("/movie/Conditional", headers={"If-None-Match": '"other"'}).status_code == 200
+    assert mock_scrape.call_count == 1
+
+#Partial aggregates are not cached, so clients are told not to keep them either
+@patch('aggregator.api.fetch_omdb')
+@patch('aggregator.api.fetch_rotten_tomatoes')
+@patch('aggregator.api.scrape_film')
+def test_partial_aggregate_is_not_cacheable(mock_scrape, mock_rt, mock_omdb):
+    from aggregator.api import CircuitOpenException
+
+    mock_scrape.return_value = {"Average_rating": 4.0}
+    mock_rt.side_effect = CircuitOpenException("rotten_tomatoes")
+    mock_omdb.return_value = (200, {"Title": "Partial", "imdbRating": "7.0"})
+
+    response = client.get("/movie/Partial")
+    assert response.status_code == 200
+    assert response.json()["circuit_open"] == ["rotten_tomatoes"]
+    assert response.headers["Cache-Control"] == "no-cache"
@@ -0,0 +1,72 @@
+from aggregator.metrics import Registry
+from aggregator.upstream import classify
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    latency = registry.histogram("lookup_seconds", "Lookup latency.", ("source",), buckets=(0.1, 1.0))
+    latency.observe(0.05, source="imdb")
+    latency.observe(0.5, source="imdb")
+    latency.observe(5, source="imdb")
+
+    lines = registry.render().splitlines()
+    assert "# TYPE lookup_seconds histogram" in lines
+    assert 'lookup_seconds_bucket{source="imdb",le="0.1"} 1' in lines
+    assert 'lookup_seconds_bucket{source="imdb",le="1.0"} 2' in lines
+    assert 'lookup_seconds_bucket{source="imdb",le="+Inf"} 3' in lines
+    assert 'lookup_seconds_count{source="imdb"} 3' in lines
+
+def test_counter_and_callback_render():
+    registry = Registry()
+    errors = registry.counter("errors_total", "Errors.", ("upstream", "status"))
+    errors.inc(upstream="letterboxd", status=429)
+    errors.inc(upstream="letterboxd", status=429)
+    registry.callback("entries", "Entries.", "gauge", lambda: 7)
+
+    text = registry.render()
+    assert 'errors_total{upstream="letterboxd",status="429"} 2' in text
+    assert "entries 7" in text
+
+def test_requests_are_classified_by_phase():
+    assert classify("GET", "http://www.omdbapi.com/?t=heat") == ("imdb", "omdb")
+    assert classify("GET", "https://www.rottentomatoes.com/search?search=heat") == ("rotten_tomatoes", "search")
+    assert classify("HEAD", "https://www.rottentomatoes.com/m/heat") == ("rotten_tomatoes", "url_probe")
+    assert classify("GET", "https://www.rottentomatoes.com/m/heat") == ("rotten_tomatoes", "page_fetch")
+    assert classify("GET", "https://letterboxd.com/film/heat/") == ("letterboxd", "film_page")
+    assert classify("GET", "https://letterboxd.com/csi/film/heat/stats/") == ("letterboxd", "stats")
+    assert classify("GET", "https://letterboxd.com/csi/film/heat/rating-histogram/") == ("letterboxd", "histogram")
+
+def test_session_requests_are_capped_by_deadline():
+    import pytest
+    import requests
+    from unittest.mock import patch
+    from aggregator import upstream
+    from aggregator.session import create_session
+
+    session = create_session()
+    with patch.object(requests.Session, "request", return_value=requests.Response()) as send:
+        send.return_value.status_code = 200
+        with upstream.deadline(1.0):
+            session.get("http://www.omdbapi.com/")
+        connect, read = send.call_args.kwargs["timeout"]
+        assert connect <= upstream.CONNECT_TIMEOUT and read <= 1.0
+
+        with upstream.deadline(0):
+            with pytest.raises(requests.Timeout):
+                session.get("http://www.omdbapi.com/")
+        assert send.call_count == 1
+
+def test_worker_label_is_added_to_every_series():
+    import os
+    from unittest.mock import patch
+    from aggregator import metrics
+
+    registry = Registry()
+    registry.counter("errors_total", "Errors.", ("upstream",)).inc(upstream="omdb")
+    registry.callback("entries", "Entries.", "gauge", lambda: 7)
+    with patch.object(metrics, "_worker_label", ""):
+        metrics.label_worker()
+        text = registry.render()
+    assert f'errors_total{{upstream="omdb",worker="{os.getpid()}"}} 1' in text
+    assert f'entries{{worker="{os.getpid()}"}} 7' in text
+    assert 'worker=' not in registry.render()
@@ -0,0 +1,55 @@
+import json
+import threading
+import time
+
+from aggregator import profiling
+from aggregator.profiling import SamplingProfiler
+
+
+def busy_worker(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+def test_profile_samples_other_threads():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_worker, args=(stop,), name="busy")
+    worker.start()
+    try:
+        result = SamplingProfiler(duration=0.1, interval=0.001).run()
+    finally:
+        stop.set()
+        worker.join()
+
+    lines = result.collapsed().splitlines()
+    busy = [line for line in lines if line.startswith("busy;")]
+    assert busy and all("busy_worker (" in line for line in busy)
+    # The sampling thread never shows up in its own profile
+    assert not any(line.startswith(threading.current_thread().name + ";") for line in lines)
+
+def test_speedscope_export_indexes_shared_frames():
+    result = SamplingProfiler(duration=0, interval=0.01)
+    frame = ("handler", "api.py", 10)
+    result.samples[("MainThread", (frame,))] = 3
+    result.samples[("MainThread", (frame, ("parse", "movie.py", 5)))] = 1
+
+    document = json.loads(result.speedscope())
+    assert document["shared"]["frames"] == [
+        {"name": "handler", "file": "api.py", "line": 10},
+        {"name": "parse", "file": "movie.py", "line": 5},
+    ]
+    profile, = document["profiles"]
+    assert profile["name"] == "MainThread"
+    assert profile["samples"] == [[0], [0, 1]]
+    assert profile["weights"] == [0.03, 0.01]
+
+def test_only_one_profile_runs_at_a_time():
+    with profiling._running:
+        assert profiling.start_profile(0.01) is None
+    assert profiling.start_profile(0.01).result(timeout=5) is not None
+
+def test_profile_runs_on_its_own_thread():
+    future = profiling.start_profile(0.02, 0.005)
+    assert profiling.start_profile(0.02) is None
+    result = future.result(timeout=5)
+    assert any(line.startswith("MainThread;") for line in result.collapsed().splitlines())
+    assert profiling.start_profile(0.01).result(timeout=5) is not None
@@ -0,0 +1,221 @@
+import io
+import os
+from unittest.mock import patch
+
+from scrapers.RottenTomato import standalone
+from scrapers.RottenTomato.movie import Movie
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "rotten_tomatoes")
+
+
+def fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+def test_extractors_read_the_movie_page():
+    page = standalone.Page(fixture("heat.html"))
+    assert standalone.movie_title("heat", page) == "Heat"
+    assert standalone.tomatometer("heat", page) == 83
+    assert standalone.audience_score("heat", page) == 94
+    assert standalone.weighted_score("heat", page) == 86
+    assert standalone.rating("heat", page) == "R"
+    assert standalone.duration("heat", page) == "2h 50m"
+    assert standalone.num_of_reviews("heat", page) == 97
+    assert standalone.genres("heat", page) == ["Crime", "Drama"]
+    assert standalone.directors("heat", content=page) == ["Michael Mann"]
+    assert standalone.actors("heat", 2, content=page) == ["Al Pacino", "Robert De Niro"]
+    assert standalone.critics_consensus("heat", page).startswith("Though Al Pacino and Robert De Niro")
+
+def test_extractors_still_accept_raw_content():
+    assert standalone.tomatometer("heat", fixture("heat.html")) == 83
+
+def test_movie_parses_its_page_once():
+    with patch.object(standalone, "_soup", wraps=standalone._soup) as parse:
+        movie = Movie("heat", content=fixture("heat.html"))
+        assert (movie.tomatometer, movie.audience_score, movie.weighted_score) == (83, 94, 86)
+        assert movie.critics_consensus
+        assert movie.actors
+    assert parse.call_count == 1
+
+def test_movie_only_extracts_the_attributes_it_is_asked_for():
+    import pytest
+
+    with patch.object(standalone, "_soup", wraps=standalone._soup) as parse:
+        movie = Movie("heat", content=fixture("heat.html"))
+        assert parse.call_count == 0
+        assert movie.tomatometer == 83
+    assert movie._tomatometer == 83
+    for unread in ("_critics_consensus", "_synopsis", "_num_of_reviews", "_rating"):
+        with pytest.raises(AttributeError):
+            getattr(movie, unread)
+    assert not hasattr(movie, "__dict__")
+
+def test_movie_str_lists_every_attribute():
+    text = str(Movie("heat", content=fixture("heat.html")))
+    assert text.startswith("Heat, R, 2h 50m.")
+    assert "Released in 1995." in text
+    assert "Directed by Michael Mann." in text
+    assert "Genres - Crime, Drama" in text
+    assert "Prominent actors: Al Pacino, Robert De Niro, Val Kilmer, Jon Voight, Tom Sizemore." in text
+
+def test_scan_matches_the_full_parse():
+    from benchmarks.rt_extraction import fast, full
+
+    for name in sorted(os.listdir(FIXTURES)):
+        (scanned_details, scanned_title, scanned_consensus), (details, title, consensus) = \
+            fast(fixture(name)), full(fixture(name))
+        assert scanned_details == details
+        assert scanned_title == title
+        assert scanned_consensus.split() == consensus.split()
+
+def test_extraction_skips_the_parse_when_the_scan_succeeds():
+    with patch.object(standalone, "_soup", wraps=standalone._soup) as parse:
+        movie = Movie("heat", content=fixture("heat.html"))
+        assert (movie.movie_title, movie.weighted_score) == ("Heat", 86)
+        assert movie.critics_consensus.endswith("pay off in a big way.")
+    parse.assert_not_called()
+
+def test_extraction_falls_back_to_the_parse_for_unexpected_markup():
+    # Single-quoted attributes are not what the scan looks for, but still valid HTML
+    content = fixture("heat.html").replace('slot="criticsScore"', "slot='criticsScore'") \
+        .replace('slot="audienceScore"', "slot='audienceScore'").replace('id="media-hero-label"', "id='media-hero-label'")
+    with patch.object(standalone, "_soup", wraps=standalone._soup) as parse:
+        movie = Movie("heat", content=content)
+        assert (movie.movie_title, movie.tomatometer, movie.audience_score) == ("Heat", 83, 94)
+    assert parse.call_count == 1
+
+def test_extraction_falls_back_to_the_parse_when_the_scan_misses_a_score():
+    # Only the audience score is in markup the scan does not expect
+    content = fixture("heat.html").replace('slot="audienceScore"', "slot='audienceScore'")
+    assert standalone.scan.score_details(content) is None
+    with patch.object(standalone, "_soup", wraps=standalone._soup) as parse:
+        movie = Movie("heat", content=content)
+        assert (movie.tomatometer, movie.audience_score) == (83, 94)
+    assert parse.call_count == 1
+
+class Body(io.BytesIO):
+    def read(self, *args, **kwargs):
+        data = super().read(*args, **kwargs)
+        self.read_bytes = getattr(self, "read_bytes", 0) + len(data)
+        return data
+
+class StreamingSession:
+    """Serves canned pages as streamed responses and records how much of each was read."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.bodies = {}
+
+    def get(self, url, headers=None, stream=False):
+        import requests
+
+        response = requests.Response()
+        response.status_code = 200
+        response.encoding = "utf-8"
+        response.raw = self.bodies[url] = Body(self.pages[url].encode())
+        return response
+
+def test_movie_page_is_only_read_up_to_the_scoreboard():
+    from benchmarks.rt_extraction import pad
+
+    url = "https://www.rottentomatoes.com/m/heat_1995"
+    page = pad(fixture("heat.html"), 500 * 1024)
+    session = StreamingSession({url: page})
+
+    content = standalone._request("", force_url=url, session=session, scores_only=True)
+    assert standalone.SCOREBOARD_END in content
+    assert session.bodies[url].read_bytes < 64 * 1024
+    assert session.bodies[url].closed
+    movie = Movie("heat", content=content)
+    assert (movie.tomatometer, movie.audience_score) == (83, 94)
+
+    assert standalone._request("", force_url=url, session=session) == page
+
+def test_search_decodes_the_page_and_stops_at_the_first_movie():
+    from scrapers.RottenTomato import search
+
+    row = ('<search-page-media-row\n    tomatometerscore="{score}"\n    releaseyear="1995">\n'
+           '    <a href="https://www.rottentomatoes.com/{path}" slot="title">Heat — {path}</a>\n'
+           '</search-page-media-row>\n')
+    page = ("<html><body><search-page-result type=\"movie\">"
+            + row.format(score="", path="m/heat_2013")
+            + row.format(score="86", path="m/heat_1995")
+            + "".join(row.format(score="50", path=f"m/heat_{i}") for i in range(2000))
+            + "</search-page-result></body></html>")
+    url = "https://www.rottentomatoes.com/search?search=heat"
+    session = StreamingSession({url: page})
+
+    assert search.top_movie_result("heat", session=session).url == "https://www.rottentomatoes.com/m/heat_1995"
+    assert session.bodies[url].read_bytes < len(page.encode()) // 4
+    assert len(search.search_results("heat", session=session)) == 2002
+
+def test_stop_conditions_see_markup_split_across_pieces():
+    from scrapers.RottenTomato import search, utils
+
+    done = utils.received("</media-scorecard>")
+    assert [done(piece) for piece in ("<div></media-", "score", "card>")] == [False, False, True]
+
+    page = ('<search-page-media-row tomatometerscore="">\n<a href="https://www.rottentomatoes.com/tv/heat">'
+            '</a></search-page-media-row><search-page-media-row tomatometerscore="86">\n'
+            '<a href="https://www.rottentomatoes.com/m/heat_1995"></a></search-page-media-row>')
+    first = search._FirstMovie()
+    pieces = [page[i:i + 7] for i in range(0, len(page), 7)]
+    assert any(first(piece) for piece in pieces)
+    assert (first.rows, first.listing.url) == (2, "https://www.rottentomatoes.com/m/heat_1995")
+    assert len(first.pending) < len(page)
+
+def test_unreadable_search_page_is_an_error_not_a_missing_movie():
+    import pytest
+    from scrapers.RottenTomato import search
+    from scrapers.RottenTomato.exceptions import LookupError, ScrapeError
+
+    url = "https://www.rottentomatoes.com/search?search=heat"
+    with pytest.raises(ScrapeError):
+        search.top_movie_result("heat", session=StreamingSession({url: "<html><body>Redesigned</body></html>"}))
+    with pytest.raises(LookupError):
+        search.top_movie_result("heat", session=StreamingSession(
+            {url: "<html><body><h2>Sorry, no results found for heat</h2></body></html>"}))
+
+class ProbeSession:
+    """Answers HEAD probes with a status per url after `delay` seconds, recording what was probed."""
+
+    def __init__(self, statuses, delay=0.1):
+        self.statuses = statuses
+        self.delay = delay
+        self.probed = []
+
+    def head(self, url, headers=None):
+        import time
+        from unittest.mock import MagicMock
+
+        self.probed.append(url)
+        time.sleep(self.delay)
+        return MagicMock(status_code=self.statuses.get(url, 404))
+
+def test_movie_url_probes_candidates_side_by_side_and_prefers_the_first():
+    import time
+
+    standalone._resolved_urls.clear()
+    standalone._missing_urls.clear()
+    base = "https://www.rottentomatoes.com/m/"
+    session = ProbeSession({base + "the_heat_1995": 200, base + "heat_1995": 200})
+
+    start = time.perf_counter()
+    assert standalone._movie_url("Heat 1995", session=session) == base + "heat_1995"
+    assert time.perf_counter() - start < 0.3
+    assert len(session.probed) == 4
+
+def test_movie_url_remembers_resolved_names_and_missing_candidates():
+    standalone._resolved_urls.clear()
+    standalone._missing_urls.clear()
+    base = "https://www.rottentomatoes.com/m/"
+    session = ProbeSession({base + "the_thing": 200}, delay=0)
+
+    assert standalone._movie_url("The Thing", session=session) == base + "the_thing"
+    assert standalone._movie_url("the thing", session=session) == base + "the_thing"
+    assert session.probed.count(base + "the_thing") == 1
+
+    session.probed.clear()
+    assert standalone._movie_url("No Such Film", session=session) == base + "no_such_film"
+    assert standalone._movie_url("No Such Film", session=session) == base + "no_such_film"
+    assert sorted(session.probed) == [base + "no_such_film", base + "the_no_such_film"]
@@ -0,0 +1,38 @@
+from benchmarks.startup import measure_import
+
+
+#Importing the app must not pull in the dependencies that are only needed once a lookup runs
+def test_import_defers_heavy_dependencies():
+    seconds, eager = measure_import()
+    assert eager == []
+
+#The production server preloads the app and sizes its workers from WEB_CONCURRENCY, else the core count
+def test_gunicorn_config_sizes_workers():
+    import multiprocessing
+    import os
+    import runpy
+    from unittest.mock import patch
+
+    with patch.dict(os.environ, {"WEB_CONCURRENCY": "3"}):
+        config = runpy.run_path("gunicorn.conf.py")
+    assert config["workers"] == 3
+    assert config["preload_app"] is True
+    assert config["worker_class"] == "uvicorn.workers.UvicornWorker"
+
+    with patch.dict(os.environ):
+        os.environ.pop("WEB_CONCURRENCY", None)
+        assert runpy.run_path("gunicorn.conf.py")["workers"] == multiprocessing.cpu_count()
+
+#Each worker paces upstream requests to its share of the deployment-wide limits
+def test_upstream_limits_are_split_between_workers():
+    import os
+    import subprocess
+    import sys
+
+    env = dict(os.environ, WEB_CONCURRENCY="4", UPSTREAM_RATE_PER_SECOND="8", UPSTREAM_BURST="2",
+               UPSTREAM_MAX_CONCURRENCY="20")
+    output = subprocess.run(
+        [sys.executable, "-c", "from aggregator.upstream import governor as g; print(g.rate, g.burst, g.max_concurrency)"],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    assert output.split() == ["2.0", "1.0", "5"]
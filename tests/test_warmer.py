@@ -0,0 +1,81 @@
+import asyncio
+
+from aggregator.warmer import CacheWarmer
+
+
+def make_warmer(titles, fresh=(), failing=(), **kwargs):
+    warmed = []
+    running = {"now": 0, "peak": 0}
+
+    async def load_titles():
+        return titles
+
+    async def is_fresh(title):
+        return title in fresh
+
+    async def warm(title):
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+        if title in failing:
+            raise RuntimeError("upstream down")
+        warmed.append(title)
+
+    kwargs.setdefault("rate", 1000)
+    return CacheWarmer(load_titles, is_fresh, warm, interval=60, **kwargs), warmed, running
+
+def test_warmer_skips_fresh_titles_and_counts_failures():
+    warmer, warmed, _ = make_warmer(["heat", "alien", "heat", "up"], fresh={"alien"}, failing={"up"})
+    status = asyncio.run(warmer.run_once())
+
+    assert warmed == ["heat"]
+    assert status["total"] == 3
+    assert (status["warmed"], status["fresh"], status["failed"]) == (1, 1, 1)
+    assert status["runs"] == 1 and status["state"] == "idle"
+    assert warmer.totals == {"warmed": 1, "fresh": 1, "failed": 1}
+
+def test_warmer_bounds_concurrency():
+    warmer, warmed, running = make_warmer([f"title {i}" for i in range(12)], concurrency=3)
+    asyncio.run(warmer.run_once())
+    assert len(warmed) == 12
+    assert running["peak"] == 3
+
+def test_only_one_process_warms_a_shared_cache(tmp_path):
+    import fcntl
+    import os
+
+    lock_path = str(tmp_path / "warm.lock")
+    warmer, warmed, _ = make_warmer(["heat"], lock_path=lock_path)
+    # Another worker holding the lock is simulated with a second open file description
+    other = os.open(lock_path, os.O_RDWR | os.O_CREAT)
+    fcntl.flock(other, fcntl.LOCK_EX)
+    try:
+        status = asyncio.run(warmer.run_once())
+    finally:
+        os.close(other)
+    assert warmed == [] and status["state"] == "warmed by another worker"
+
+    asyncio.run(warmer.run_once())
+    assert warmed == ["heat"]
+
+def test_letterboxd_list_titles_are_read_page_by_page():
+    from unittest.mock import MagicMock
+    from scrapers.LetterBoxd.scrape_functions import scrape_list_titles
+
+    def page(*posters):
+        response = MagicMock(status_code=200)
+        response.content = ("<ul>" + "".join(
+            f'<li class="poster-container"><div class="film-poster" data-film-slug="{slug}">{img}</div></li>'
+            for slug, img in posters) + "</ul>").encode()
+        return response
+
+    session = MagicMock()
+    session.get.side_effect = [
+        page(("the-godfather", '<img alt="The Godfather"/>'), ("heat", "")),
+        page(("alien", '<img alt="Alien"/>')),
+        page(),
+    ]
+    assert scrape_list_titles("https://letterboxd.com/someone/list/faves", session=session) == \
+        ["The Godfather", "heat", "Alien"]
+    assert session.get.call_args_list[1].args[0] == "https://letterboxd.com/someone/list/faves/page/2/"